@@ -4,13 +4,15 @@ import hashlib
 from openpyxl import Workbook, load_workbook
 from colorama import Fore, Style, init
 import logging
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import heapq
 import itertools
-import json
-from collections import Counter
-import random
-from models import Student, StudentRequest, RequestQueue, StudentBST
+import atexit
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import nullcontext
+from models import (Student, StudentRequest, RequestQueue, StudentBST, StudentJournal,
+                    RequestJournal, RequestSnapshot, ProcessedLog, AgingPolicy, ShardedRequestQueue,
+                    ColumnarStudentStore, atomic_write, make_dummy_requests, fits_int, INT32_MAX, INT64_MAX)
 from graphviz import Digraph
 import os
 from dotenv import load_dotenv
@@ -41,50 +43,193 @@ logging.basicConfig(
 )
 
 STORAGE_FILE = "student_data.pkl"
+JOURNAL_FILE = "student_data.journal"
+COLUMNAR_FILE = "student_data.col"
 student_tree = StudentBST()
+student_journal = None   # StudentJournal attached to student_tree by load_data()
+student_store = None     # memory-mapped ColumnarStudentStore when startup took the fast path
+# concurrent commits within this window share one fsync (0 = commit immediately)
+JOURNAL_GROUP_COMMIT_MS = float(os.getenv("JOURNAL_GROUP_COMMIT_MS", "0"))
 
 REQUEST_FILE = "requests_data.json"
+REQUEST_BINARY_FILE = "requests_data.bin"
+REQUEST_JOURNAL_FILE = "requests_journal.jsonl"
+# snapshot format for the request queue: "json" or "binary" (RequestSnapshot)
+REQUEST_SNAPSHOT_BINARY = os.getenv("REQUEST_SNAPSHOT_FORMAT", "json").lower() == "binary"
+REQUEST_SNAPSHOT_FILE = REQUEST_BINARY_FILE if REQUEST_SNAPSHOT_BINARY else REQUEST_FILE
+request_journal = None   # RequestJournal attached to request_queue by load_requests()
+# waiting this many seconds lifts a request one priority level (0 = strict priority order)
+REQUEST_AGING_SECONDS = float(os.getenv("REQUEST_AGING_SECONDS", "0"))
+# hold the queue in a ShardedRequestQueue over this many worker processes (0 = one in-process queue)
+REQUEST_SHARDS = int(os.getenv("REQUEST_SHARDS", "0"))
+
+PROCESSED_LOG_FILE = "processed_requests.log"
+processed_log = None     # ProcessedLog opened by load_requests()
+# flush processed entries every N records or T ms (fsync optional); seal segments past MAX_BYTES
+PROCESSED_LOG_FLUSH_EVERY = int(os.getenv("PROCESSED_LOG_FLUSH_EVERY", "32"))
+PROCESSED_LOG_FLUSH_MS = float(os.getenv("PROCESSED_LOG_FLUSH_MS", "1000"))
+PROCESSED_LOG_FSYNC = os.getenv("PROCESSED_LOG_FSYNC", "0") == "1"
+PROCESSED_LOG_MAX_BYTES = int(os.getenv("PROCESSED_LOG_MAX_BYTES", str(1 << 20)))
 
 def save_requests():
-    with open(REQUEST_FILE, "w") as f:
-        f.write(request_queue.to_json())
-    logging.info("Request queue saved.")
+    """
+    Make queue changes durable. With the journal attached only the new
+    enqueue/dequeue/remove records are appended; the snapshot (JSON or
+    binary, per REQUEST_SNAPSHOT_FORMAT) is rewritten in the background once
+    enough records pile up. A snapshot that cannot be written is logged, not
+    raised; with the journal attached every change is still in the journal.
+    """
+    if request_journal is None:
+        try:
+            if REQUEST_SNAPSHOT_BINARY:
+                RequestSnapshot.write(REQUEST_BINARY_FILE, request_queue)
+            else:   # JSON export format
+                atomic_write(REQUEST_FILE, request_queue.to_json().encode('utf-8'))
+        except (ValueError, OverflowError, OSError) as e:
+            logging.error(f"Could not save the request queue: {e}")
+            return
+        logging.info("Request queue saved.")
+        return
+
+    request_journal.commit()
+    if request_journal.needs_compaction():
+        try:
+            request_journal.compact(REQUEST_SNAPSHOT_FILE, binary=REQUEST_SNAPSHOT_BINARY)
+        except (ValueError, OverflowError) as e:
+            logging.error(f"Skipped request snapshot {REQUEST_SNAPSHOT_FILE}: {e}")
+    logging.info("Request changes committed to journal.")
 
 def load_requests():
-    global request_queue
-    if os.path.exists(REQUEST_FILE):
-        with open(REQUEST_FILE) as f:
-            request_queue = RequestQueue.from_json(f.read())
+    global request_queue, request_journal, processed_log
+    # the newest snapshot wins, so switching REQUEST_SNAPSHOT_FORMAT never loads a stale one
+    path, loaded = RequestSnapshot.load_latest((REQUEST_FILE, REQUEST_BINARY_FILE))
+    if loaded is not None:
+        request_queue = loaded
         logging.info("Request queue loaded.")
+        if path != REQUEST_SNAPSHOT_FILE:
+            RequestSnapshot.write(REQUEST_SNAPSHOT_FILE, request_queue, binary=REQUEST_SNAPSHOT_BINARY)
+            logging.info(f"Converted {path} to {REQUEST_SNAPSHOT_FILE}.")
+    if REQUEST_SHARDS > 0:
+        sharded = ShardedRequestQueue(REQUEST_SHARDS)
+        sharded.bulk_enqueue(request_queue.list_all())
+        sharded.journal_seq = request_queue.journal_seq
+        request_queue = sharded
+        atexit.register(sharded.close)
+        logging.info(f"Request queue sharded over {REQUEST_SHARDS} worker process(es).")
+        if REQUEST_AGING_SECONDS > 0:
+            logging.warning("REQUEST_AGING_SECONDS is ignored by the sharded request queue.")
+    elif REQUEST_AGING_SECONDS > 0:
+        request_queue.policy = AgingPolicy(age_step=REQUEST_AGING_SECONDS)
+
+    # replay queue events logged since the snapshot, then journal new ones
+    request_journal = RequestJournal(REQUEST_JOURNAL_FILE, group_commit_ms=JOURNAL_GROUP_COMMIT_MS)
+    replayed = request_journal.replay(request_queue)
+    request_journal.attach(request_queue)
+    if replayed:
+        logging.info(f"Replayed {replayed} request journal record(s) over the snapshot.")
+
+    processed_log = ProcessedLog(PROCESSED_LOG_FILE, flush_every=PROCESSED_LOG_FLUSH_EVERY,
+                                 flush_ms=PROCESSED_LOG_FLUSH_MS, fsync=PROCESSED_LOG_FSYNC,
+                                 max_bytes=PROCESSED_LOG_MAX_BYTES)
+    atexit.register(processed_log.close)
 
 
 def save_data():
-    with open(STORAGE_FILE, 'wb') as f:
-        pickle.dump(student_tree, f)
-    logging.info("Student data saved to persistent storage.")
+    """
+    Make pending student changes durable. With the journal attached this only
+    appends and fsyncs the changed records; once enough records pile up the
+    journal is compacted into a fresh snapshot in the background.
+    """
+    if student_journal is None:
+        atomic_write(STORAGE_FILE, pickle.dumps(student_tree))
+        logging.info("Student data saved to persistent storage.")
+        return
+
+    student_journal.commit()
+    if student_journal.needs_compaction():
+        student_journal.compact(STORAGE_FILE, COLUMNAR_FILE)
+    logging.info("Student changes committed to journal.")
 
 def load_data():
-    global student_tree
-    if not os.path.exists(STORAGE_FILE):
-        return
+    """
+    Open the student data. If the columnar snapshot is up to date (no journal
+    records after it, not older than the pickle) it is just memory-mapped and
+    the tree is only built on the first change; otherwise the pickle and the
+    journal are loaded, and a compaction refreshes the columnar file.
+    """
+    global student_tree, student_store
+    journal = StudentJournal(JOURNAL_FILE, group_commit_ms=JOURNAL_GROUP_COMMIT_MS)
+    if (os.path.exists(COLUMNAR_FILE) and journal.is_empty() and
+            (not os.path.exists(STORAGE_FILE) or
+             os.path.getmtime(COLUMNAR_FILE) >= os.path.getmtime(STORAGE_FILE))):
+        try:
+            student_store = ColumnarStudentStore(COLUMNAR_FILE)
+            student_tree = None
+            logging.info(f"Mapped {len(student_store)} students from {COLUMNAR_FILE}.")
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not open {COLUMNAR_FILE} ({e}); loading the pickle instead.")
 
-    with open(STORAGE_FILE, 'rb') as f:
-        data = pickle.load(f)
-
-    # if it’s still the old dict format, re-build the BST
-    if isinstance(data, dict):
-        old_dict = data
-        bst = StudentBST()
-        for student in old_dict.values():
-            bst.insert(student)
-        student_tree = bst
-        logging.info("Migrated old dict data into StudentBST.")
-    # if it’s already a BST, just assign it
-    elif isinstance(data, StudentBST):
-        student_tree = data
-        logging.info("Loaded StudentBST from storage.")
-    else:
-        raise RuntimeError(f"Unexpected data type in {STORAGE_FILE}: {type(data)}")
+    replayed = load_student_tree(journal)
+    if replayed or not os.path.exists(COLUMNAR_FILE):
+        # fold the replayed records into fresh snapshots so the next start is fast
+        student_journal.compact(STORAGE_FILE, COLUMNAR_FILE)
+
+def load_student_tree(journal=None):
+    """
+    Load the pickled StudentBST (or, without a pickle, rebuild it from the
+    columnar snapshot), replay the journal over it and attach the journal.
+    """
+    global student_tree, student_journal
+    student_tree = StudentBST()
+    if os.path.exists(STORAGE_FILE):
+        with open(STORAGE_FILE, 'rb') as f:
+            data = pickle.load(f)
+
+        # if it’s still the old dict format, re-build the BST
+        if isinstance(data, dict):
+            student_tree = StudentBST.from_sorted(data.values())
+            logging.info("Migrated old dict data into StudentBST.")
+        # if it’s already a BST, just assign it
+        elif isinstance(data, StudentBST):
+            student_tree = data
+            logging.info("Loaded StudentBST from storage.")
+        else:
+            raise RuntimeError(f"Unexpected data type in {STORAGE_FILE}: {type(data)}")
+    elif os.path.exists(COLUMNAR_FILE):
+        store = ColumnarStudentStore(COLUMNAR_FILE)
+        student_tree = StudentBST.from_sorted(store.to_students())
+        student_tree.journal_seq = store.journal_seq
+        store.close()
+        logging.info(f"Rebuilt StudentBST from {COLUMNAR_FILE} (no {STORAGE_FILE}).")
+
+    # replay changes made since the snapshot, then journal new ones
+    student_journal = journal or StudentJournal(JOURNAL_FILE, group_commit_ms=JOURNAL_GROUP_COMMIT_MS)
+    replayed = student_journal.replay(student_tree)
+    student_journal.attach(student_tree)
+    if replayed:
+        logging.info(f"Replayed {replayed} journal record(s) over the snapshot.")
+    return replayed
+
+def ensure_student_tree():
+    """Return the editable StudentBST, loading it now if startup only mapped the columnar file."""
+    global student_store
+    if student_tree is None:
+        load_student_tree()
+        student_store.close()
+        student_store = None
+    return student_tree
+
+def student_view():
+    """Read-only view of the students: the tree once loaded, else the columnar store."""
+    return student_tree if student_tree is not None else student_store
+
+def student_batch():
+    """
+    Transaction over student changes: everything inside is written to the
+    journal once, atomically, and rolled back in memory if an error escapes.
+    """
+    return student_journal.batch() if student_journal else nullcontext()
 
 def valid_email_format(email):
     return re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email)
@@ -92,18 +237,53 @@ def valid_email_format(email):
 def valid_course_code(course):
     return re.match(r"^[A-Z]{2,4}\d{3}$", course)
 
-def display_all_students():
-    any_printed = False
-    for student in student_tree.in_order_traversal():
-        student.display_details()
-        any_printed = True
-    if not any_printed:
+def valid_student_id(student_id):
+    # IDs are stored as int64 in the columnar snapshot
+    return fits_int(student_id, INT64_MAX)
+
+STUDENTS_PER_PAGE = 20
+
+def display_all_students(page_size=STUDENTS_PER_PAGE):
+    """
+    Show the roster one page at a time. Each page is fetched with
+    StudentBST.page, so jumping to a late page skips the earlier ones.
+    """
+    students = student_view()
+    total = len(students)
+    if not total:
         print("No students registered.")
+        return
+
+    pages = (total + page_size - 1) // page_size
+    page_no = 1
+    while True:
+        for student in students.page((page_no - 1) * page_size, page_size):
+            student.display_details()
+        if pages == 1:
+            return
+
+        choice = input(
+            f"Page {page_no} of {pages} — enter a page number, "
+            f"N (next), P (previous), or blank to return: "
+        ).strip().upper()
+        if not choice:
+            return
+        elif choice == "N":
+            page_no = min(page_no + 1, pages)
+        elif choice == "P":
+            page_no = max(page_no - 1, 1)
+        elif choice.isdigit() and 1 <= int(choice) <= pages:
+            page_no = int(choice)
+        else:
+            print("Invalid page.")
 
 def add_student():
     try:
         student_id = int(input("What is the student ID: "))
-        if student_tree.search(student_id) is not None:
+        if not valid_student_id(student_id):
+            print("Student ID is out of range.")
+            return
+        if ensure_student_tree().search(student_id) is not None:
             print("Student ID already registered.")
             return
 
@@ -157,7 +337,7 @@ def enroll_course():
         print("Invalid input. Student ID must be a number.")
         return
 
-    student = student_tree.search(stud_id)
+    student = ensure_student_tree().search(stud_id)
     if not student:
         print("Student ID not found.")
         return
@@ -187,7 +367,7 @@ def remove_student_course():
         print("Invalid input. Student ID must be a number.")
         return
 
-    student = student_tree.search(stud_id)
+    student = ensure_student_tree().search(stud_id)
     if not student:
         print("Student ID not found.")
         return
@@ -207,7 +387,7 @@ def remove_student_course():
     print(f"Course {course} successfully removed from student {stud_id}.")
 
 def bubble_sort_year_of_study():
-    sorted_list = list(student_tree.values())
+    sorted_list = list(student_view().values())
     for i in range(len(sorted_list)):
         for j in range(0, len(sorted_list) - i - 1):
             if sorted_list[j].year_of_study > sorted_list[j + 1].year_of_study:
@@ -217,7 +397,7 @@ def bubble_sort_year_of_study():
         s.display_details()
 
 def selection_sort_num_reg_course():
-    sorted_list = list(student_tree.values())
+    sorted_list = list(student_view().values())
     n = len(sorted_list)
     for i in range(n):
         max_index = i
@@ -229,33 +409,91 @@ def selection_sort_num_reg_course():
     for s in sorted_list:
         s.display_details()
 
+SEARCH_RESULT_LIMIT = 10
+
 def search_student():
+    """
+    Look a student up by ID, or by full or partial name (case-insensitive).
+    Name matches come from the tree's name index, ranked and capped.
+    """
     key = input("Enter student ID or Name to search: ").strip()
     logging.info(f"Search performed for student: {key}")
-    found = False
 
     try:
         key_id = int(key)
-        student = student_tree.search(key_id)
+        student = student_view().search(key_id)
         if student:
             student.display_details()
             return
     except ValueError:
         pass
 
-    for student in student_tree.in_order_traversal():
-        if student.name.lower() == key.lower():
-            student.display_details()
-            found = True
-
-    if not found:
+    matches = student_view().find_by_name(key, limit=SEARCH_RESULT_LIMIT)
+    if not matches:
         print("Student not found.")
+        return
+    for student in matches:
+        student.display_details()
+    if len(matches) == SEARCH_RESULT_LIMIT:
+        print(f"Showing the top {SEARCH_RESULT_LIMIT} matches; refine the name to narrow results.")
+
+def parse_id_range(text):
+    """
+    Parse an ID range such as '240000-249999', '240000-' (at or after)
+    or '-249999' (at or before). Blank means all students.
+    Returns (lo, hi) with None for an open bound, or None if invalid.
+    """
+    text = text.strip()
+    if not text:
+        return None, None
+    if "-" not in text:
+        try:
+            sid = int(text)
+        except ValueError:
+            return None
+        return sid, sid
+    lo_text, hi_text = (part.strip() for part in text.split("-", 1))
+    try:
+        lo = int(lo_text) if lo_text else None
+        hi = int(hi_text) if hi_text else None
+    except ValueError:
+        return None
+    if lo is not None and hi is not None and lo > hi:
+        return None
+    return lo, hi
+
+def display_students_in_range():
+    bounds = parse_id_range(input("Enter ID range (e.g. 240000-249999, 240000- or -249999): "))
+    if bounds is None:
+        print("Invalid ID range.")
+        return
+    any_printed = False
+    for student in student_view().range(*bounds):
+        student.display_details()
+        any_printed = True
+    if not any_printed:
+        print("No students in that range.")
+
+def view_course_roster():
+    course = input("Enter course code: ").strip().upper()
+    if not valid_course_code(course):
+        print("Invalid course code format. Format must be like CS123.")
+        return
+    roster = student_view().roster(course)
+    print(f"{course}: {len(roster)} student(s) enrolled.")
+    for student in roster:
+        print(f"  {student.student_id}  {student.name}")
 
 def export_to_excel():
-    if not student_tree:
+    if not student_view():
         print("No students to export.")
         return
 
+    bounds = parse_id_range(input("Enter ID range to export (e.g. 240000-249999, blank = all): "))
+    if bounds is None:
+        print("Invalid ID range.")
+        return
+
     filename = input("Enter a name for the Excel file (without extension): ").strip()
     if not filename.lower().endswith(".xlsx"):
         filename += ".xlsx"
@@ -265,7 +503,9 @@ def export_to_excel():
     ws.title = "Students"
     ws.append(["Student ID", "Name", "Email", "Courses", "Year of Study", "Full-time"])
 
-    for student in student_tree.values():
+    students = list(student_view().range(*bounds))
+    Student.cache_emails(students)  # one batched decrypt for the whole export
+    for student in students:
         ws.append([
             student.student_id,
             student.name,
@@ -290,35 +530,42 @@ def import_from_excel():
     try:
         wb = load_workbook(filename)
         ws = wb.active
+        ensure_student_tree()
+
+        # all rows land as one journal transaction; a bad row rolls back the import
+        with student_batch():
+            new_students = {}   # rows for IDs not yet in the tree, bulk-loaded at the end
+            for row in ws.iter_rows(min_row=2, values_only=True):
+                student_id    = int(row[0])
+                if not valid_student_id(student_id):
+                    raise ValueError(f"student ID {student_id} is out of range")
+                name          = row[1]
+                email         = row[2]
+                course_list   = [c.strip().upper() for c in row[3].split(',')] if row[3] else []
+                year_of_study = int(row[4])
+                is_full_time  = row[5].strip().lower() == "yes"
+
+                # Build a Student object
+                new_student = Student(
+                    name, student_id, email,
+                    course_list, year_of_study, is_full_time
+                )
+
+                existing = student_tree.search(student_id)
+                if existing:
+                    # update existing student
+                    existing.name          = name
+                    existing.email         = email
+                    existing.course_list   = course_list
+                    existing.year_of_study = year_of_study
+                    existing.is_full_time  = is_full_time
+                    logging.info(f"Updated student {student_id} from Excel import.")
+                else:
+                    # queue a new student node (a repeated row replaces the earlier one)
+                    new_students[student_id] = new_student
+                    logging.info(f"Imported new student {student_id} from Excel.")
 
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            student_id    = int(row[0])
-            name          = row[1]
-            email         = row[2]
-            course_list   = [c.strip().upper() for c in row[3].split(',')] if row[3] else []
-            year_of_study = int(row[4])
-            is_full_time  = row[5].strip().lower() == "yes"
-
-            # Build a Student object
-            new_student = Student(
-                name, student_id, email,
-                course_list, year_of_study, is_full_time
-            )
-
-            existing = student_tree.search(student_id)
-            if existing:
-                # update existing student
-                existing.name          = name
-                existing.email         = email
-                existing.course_list   = course_list
-                existing.year_of_study = year_of_study
-                existing.is_full_time  = is_full_time
-                logging.info(f"Updated student {student_id} from Excel import.")
-            else:
-                # insert a new student node
-                student_tree.insert(new_student)
-                logging.info(f"Imported new student {student_id} from Excel.")
-
+            student_tree.bulk_load(new_students.values())
         save_data()
         print(f"Student data successfully imported from '{filename}'.")
     except FileNotFoundError:
@@ -350,12 +597,13 @@ def quick_sort_students(students):
 
 
 def quick_sort_year_name():
-    students = list(student_tree.values())
+    students = list(student_view().values())
     if not students:
         print("No students to sort.")
         return
 
     sorted_list = quick_sort_students(students)
+    Student.cache_emails(sorted_list)
 
     headers = ["ID", "Name", "Email", "Courses", "Year", "Full-time"]
     rows = [
@@ -422,7 +670,7 @@ def merge_sort_students(students):
 
 
 def merge_sort_by_courses_and_id():
-    students = list(student_tree.values())
+    students = list(student_view().values())
     if not students:
         print("No students in the system.")
         return
@@ -439,6 +687,7 @@ def merge_sort_by_courses_and_id():
         return
 
     sorted_list = merge_sort_students(filtered)
+    Student.cache_emails(sorted_list)
 
     headers = ["ID", "Name", "Email", "Courses", "Year", "Full-time"]
     rows = [
@@ -485,7 +734,15 @@ def undo_action():
         return
 
     action, req = undo_stack.pop()
-    if action == "enqueue":
+    if action == "dequeue_batch":
+        # undo a batch => re-enqueue every request it processed
+        for r in req:
+            request_queue.enqueue(r)
+        save_requests()
+        print(f"Undid batch (re-enqueued {len(req)} requests)")
+        redo_stack.append(("dequeue_batch", req))
+
+    elif action == "enqueue":
         # undo enqueue => remove that specific request
         request_queue.remove_request(req.request_id)
         save_requests()  # ✅ persist change
@@ -506,7 +763,15 @@ def redo_action():
         return
 
     action, req = redo_stack.pop()
-    if action == "enqueue":
+    if action == "dequeue_batch":
+        # redo a batch => remove its requests again
+        for r in req:
+            request_queue.remove_request(r.request_id)
+        save_requests()
+        print(f"Redid batch (removed {len(req)} requests)")
+        undo_stack.append(("dequeue_batch", req))
+
+    elif action == "enqueue":
         # redo enqueue => put it back
         request_queue.enqueue(req)
         save_requests()  # ✅ persist change
@@ -530,14 +795,8 @@ def view_requests_menu():
 
 
 def student_exists(sid):
-    """
-    Sequentially search through student_registration_list
-    to see if a student with ID==sid is registered.
-    """
-    for key in student_tree.keys():
-        if key == sid:
-            return True
-    return False
+    """Check whether a student with ID==sid is registered (O(1) hash lookup)."""
+    return sid in student_view()
 
 def view_queue_stats_menu():
     """
@@ -551,28 +810,29 @@ def view_queue_stats_menu():
     print("3. Summary of all Request Types and Priority Levels")
     choice = input("Enter choice: ").strip()
 
-    all_req = request_queue.list_all()
+    # counts come from the queue's running counters, not a scan
     if choice == '1':
         rt = input("Enter Request Type to filter: ").strip().lower()
-        count = sum(1 for r in all_req if r.request_type.lower() == rt)
+        count = request_queue.count_by_type(rt)
         print(f"{count} request(s) with type '{rt}'.")
     elif choice == '2':
         lvl_input = input("Enter Priority Level to filter: ").strip()
         try:
             lvl = int(lvl_input)
-            count = sum(1 for r in all_req if r.priority_level == lvl)
+            count = request_queue.count_by_priority(lvl)
             print(f"{count} request(s) with priority level {lvl}.")
         except ValueError:
             print("Invalid priority level.")
     elif choice == '3':
-        types   = Counter(r.request_type for r in all_req)
-        prios   = Counter(r.priority_level for r in all_req)
+        types   = request_queue.type_counts()
+        prios   = request_queue.priority_counts()
+        oldest  = request_queue.oldest_pending()
         print("Requests by Type:")
         for t, c in types.items():
             print(f"  {t}: {c}")
         print("\nRequests by Priority Level:")
-        for p, c in sorted(prios.items()):
-            print(f"  {p}: {c}")
+        for p, c in prios.items():
+            print(f"  {p}: {c}  (oldest: {oldest[p].strftime('%Y-%m-%d %H:%M:%S')})")
     else:
         print("Invalid choice.")
 
@@ -592,10 +852,10 @@ def add_request_action():
         print(f"{Fore.RED}Student ID {sid} not found in system. Cannot add request.{Style.RESET_ALL}")
         return
 
-    existing = [r for r in request_queue.list_all() if r.student_id == sid]
+    existing = request_queue.count_for(sid)
     if existing:
         confirm = input(
-            f"{Fore.YELLOW}Student {sid} already has {len(existing)} pending request(s). "
+            f"{Fore.YELLOW}Student {sid} already has {existing} pending request(s). "
             f"Add another? (YES/NO): {Style.RESET_ALL}"
         ).strip().upper()
 
@@ -614,6 +874,9 @@ def add_request_action():
     except ValueError:
         print(f"{Fore.RED}Invalid priority; must be an integer.{Style.RESET_ALL}")
         return
+    if not fits_int(prio, INT32_MAX):
+        print(f"{Fore.RED}Invalid priority; must fit in 32 bits.{Style.RESET_ALL}")
+        return
 
     details = input("Request Details: ").strip()
     if not details:
@@ -632,6 +895,23 @@ def add_request_action():
 
 
 
+def export_requests():
+    """
+    Write the pending requests, in dequeue order, as RequestQueue.to_json()
+    (a list of request dicts). The snapshot files hold the queue in row or
+    binary form; this is the readable export.
+    """
+    filename = input("Enter a name for the JSON file (blank = requests_export): ").strip() or "requests_export"
+    if not filename.lower().endswith(".json"):
+        filename += ".json"
+    try:
+        atomic_write(filename, request_queue.to_json().encode('utf-8'))
+    except OSError as e:
+        print(f"{Fore.RED}Could not write {filename}: {e}{Style.RESET_ALL}")
+        return
+    logging.info(f"Exported {request_queue.size()} request(s) to {filename}.")
+    print(f"{Fore.GREEN}Exported {request_queue.size()} request(s) to {filename}.{Style.RESET_ALL}")
+
 def process_request_action():
     """
     Dequeue the highest-priority request, display and log it,
@@ -662,9 +942,10 @@ def process_request_action():
         "processed_at": datetime.now(timezone.utc).isoformat(),
         **req.to_dict()
     }
-    with open('processed_requests.log', 'a') as f:
-        f.write(json.dumps(entry) + "\n")
-    logging.info(f"Processed and logged request: {req!r}")
+    if processed_log.record(entry):
+        logging.info(f"Processed and logged request: {req!r}")
+    else:
+        logging.info(f"Processed request {req.request_id} again; already in the log, not re-logged.")
 
     # 5) Record undo
     undo_stack.append(("dequeue", req))
@@ -673,6 +954,72 @@ def process_request_action():
     print(f"{Fore.GREEN}Request processed and logged.{Style.RESET_ALL}\n")
 
 
+# request_type -> handler(req) used by batch processing; other types use handle_request.
+# Handlers run in the worker pool, so they must be thread-safe (and module-level,
+# i.e. picklable, when BATCH_POOL=process).
+REQUEST_HANDLERS = {}
+BATCH_POOL = os.getenv("BATCH_POOL", "thread")    # "thread" or "process"
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+def handle_request(req):
+    """Default handler: nothing to do beyond recording the request as processed."""
+    return req.request_id
+
+def run_request_handler(req):
+    return REQUEST_HANDLERS.get(req.request_type, handle_request)(req)
+
+def process_batch_action():
+    """
+    Dequeue a batch of requests and run them through their handlers in a
+    worker pool. The batch is persisted and logged once and recorded as a
+    single undo entry; requests whose handler fails go back on the queue.
+    """
+    if request_queue.is_empty():
+        print(f"{Fore.YELLOW}No pending requests.{Style.RESET_ALL}")
+        return
+
+    n_input = input(f"How many requests to process (blank = all {request_queue.size()}): ").strip()
+    try:
+        n = int(n_input) if n_input else request_queue.size()
+    except ValueError:
+        print(f"{Fore.RED}Invalid number.{Style.RESET_ALL}")
+        return
+
+    start = time.perf_counter()
+    batch = request_queue.dequeue_batch(n)
+    processed, failed = [], []
+    pool_cls = ProcessPoolExecutor if BATCH_POOL == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=BATCH_WORKERS) as pool:
+        futures = [pool.submit(run_request_handler, req) for req in batch]
+        for req, future in zip(batch, futures):
+            try:
+                future.result()
+                processed.append(req)
+            except Exception as e:
+                failed.append(req)
+                logging.error(f"Handler failed for request {req.request_id}: {e}")
+    for req in failed:
+        request_queue.enqueue(req)
+
+    processed_at = datetime.now(timezone.utc).isoformat()
+    for req in processed:
+        processed_log.record({"processed_at": processed_at, **req.to_dict()})
+    processed_log.flush()
+    save_requests()
+    elapsed = time.perf_counter() - start
+
+    if processed:
+        undo_stack.append(("dequeue_batch", processed))
+        redo_stack.clear()
+    rate = len(processed) / elapsed if elapsed else float(len(processed))
+    logging.info(f"Batch processed {len(processed)} request(s), {len(failed)} failed, "
+                 f"{rate:.0f} req/s.")
+    print(f"{Fore.GREEN}Processed {len(processed)} request(s) in {elapsed:.2f}s "
+          f"({rate:,.0f} req/s).{Style.RESET_ALL}")
+    if failed:
+        print(f"{Fore.RED}{len(failed)} request(s) failed and were re-queued.{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}Requests remaining: {Fore.YELLOW}{request_queue.size()}\n")
+
 def display_requests_table(requests):
     headers = ["Req ID", "Student ID", "Type", "Priority", "Timestamp"]
     rows = [
@@ -712,31 +1059,7 @@ def generate_dummy_requests(n):
     Generate n dummy StudentRequest objects and enqueue them.
     Uses your existing request_queue.
     """
-    sample_types = [
-        "Password Reset", "Profile Update", "Transcript Request",
-        "Course Enrollment", "Grade Appeal", "Fee Waiver"
-    ]
-    sample_details = {
-        "Password Reset": "Forgot password, needs reset link.",
-        "Profile Update": "Change of address and phone number.",
-        "Transcript Request": "Official transcript for internship.",
-        "Course Enrollment": "Add CS101 to my schedule.",
-        "Grade Appeal": "Review grade for assignment 3.",
-        "Fee Waiver": "Request waiver for late payment fee."
-    }
-
-    existing_ids = list(student_tree.keys())
-    for _ in range(n):
-        sid = random.choice(existing_ids) if existing_ids else random.randint(10000, 99999)
-        rtype = random.choice(sample_types)
-        prio = random.randint(1, 5)
-        details = sample_details[rtype]
-        delta_secs = random.randint(0, 7 * 24 * 3600)
-        ts = datetime.now(timezone.utc) - timedelta(seconds=delta_secs)
-
-        req = StudentRequest(sid, rtype, prio, details, timestamp=ts)
-        request_queue.enqueue(req)
-
+    request_queue.bulk_enqueue(make_dummy_requests(n, student_view().student_ids()))
     save_requests()  # ✅ persist to file
     print(f"Enqueued {n} dummy requests.")
 
@@ -751,32 +1074,27 @@ def dashboard_summary():
       - Total pending requests
       - Breakdown of requests by type
     """
-    from collections import Counter
-
     print(f"\n{Fore.MAGENTA}{Style.BRIGHT}📊 Dashboard Summary{Style.RESET_ALL}\n")
 
     # 1. Total / FT / PT students
-    total_students = len(student_tree)
-    full_time      = sum(1 for s in student_tree.values() if s.is_full_time)
+    students       = student_view()
+    total_students = len(students)
+    full_time      = students.full_time_count()
     part_time      = total_students - full_time
 
-    # 2. Most common course
-    all_courses = [course for s in student_tree.values() for course in s.course_list]
-    course_counts = Counter(all_courses)
-    if course_counts:
-        common_course, common_count = course_counts.most_common(1)[0]
-    else:
-        common_course, common_count = ("N/A", 0)
+    # 2. Most common course (straight from the course index)
+    top = students.top_courses(1)
+    common_course, common_count = top[0] if top else ("N/A", 0)
 
     # 3. Average courses per student
-    avg_courses = (sum(len(s.course_list) for s in student_tree.values()) /
+    avg_courses = (sum(students.course_counts().values()) /
                    total_students) if total_students else 0.0
 
     # 4. Pending requests
     pending_requests = request_queue.size()
 
     # 5. Breakdown of requests by type
-    req_types = Counter(r.request_type for r in request_queue.list_all())
+    req_types = request_queue.type_counts()
 
     # — now print everything
     print(f"{Fore.CYAN}Total students:            {Fore.YELLOW}{total_students}")
@@ -932,30 +1250,12 @@ def ai_course_advisory():
         except requests.RequestException as e:
             print(f"\n⚠️ Request failed: {e}\n")
 
-def fix_encrypted_emails():
-    fixed = 0
-    for student in student_tree.values():
-        if "<decrypt_error>" in student.email:
-            try:
-                # email is invalid, probably not encrypted yet
-                raw_email = getattr(student, '__dict__', {}).get('email')
-                if raw_email:
-                    student.email = raw_email  # triggers encryption setter
-                    del student.__dict__['email']  # cleanup
-                    fixed += 1
-            except Exception:
-                continue
-    if fixed > 0:
-        print(f"🔧 Fixed {fixed} students with unencrypted email.")
-        save_data()
-    else:
-        print("✅ All emails already encrypted properly.")
-
 def load_student_df():
-    with open("student_data.pkl", "rb") as f:
-        bst = pickle.load(f)
+    # the snapshot on disk may lag the journal, so read the live tree
     rows = []
-    for s in bst.values():
+    students = student_view().values()
+    Student.cache_emails(students)
+    for s in students:
         rows.append({
             "id": s.student_id,
             "name": s.name,
@@ -966,15 +1266,9 @@ def load_student_df():
         })
     return pd.DataFrame(rows)
 
-def load_requests_df():
-    with open("requests_data.json", "r") as f:
-        data = json.load(f)
-    return pd.DataFrame(data)
-
 # Generate charts + PDF
 def export_dashboard_charts_pdf(pdf_name=None):
     df_stu = load_student_df()
-    df_req = load_requests_df()
 
     total = len(df_stu)
     ft = int((df_stu["status"] == "Full-time").sum()) if total else 0
@@ -982,12 +1276,14 @@ def export_dashboard_charts_pdf(pdf_name=None):
 
     top_course, top_count, vc_courses = "N/A", 0, pd.Series(dtype=int)
     if total:
-        exploded = df_stu.explode("courses")
-        vc_courses = exploded["courses"].dropna().value_counts()
+        vc_courses = pd.Series(dict(student_view().top_courses()), dtype=int)
         if not vc_courses.empty:
             top_course, top_count = vc_courses.index[0], int(vc_courses.iloc[0])
 
-    pending = len(df_req)
+    # request breakdowns come straight from the live queue's counters
+    pending = request_queue.size()
+    req_types = pd.Series(request_queue.type_counts(), dtype=int)
+    req_prios = pd.Series(request_queue.priority_counts(), dtype=int)
 
     if pdf_name and not pdf_name.lower().endswith(".pdf"):
         pdf_name += ".pdf"
@@ -1038,14 +1334,14 @@ def export_dashboard_charts_pdf(pdf_name=None):
         # Page 4: Requests by Type
         if pending:
             fig4, ax4 = plt.subplots(figsize=(8.3, 5.8))
-            df_req["request_type"].value_counts().sort_values(ascending=True).plot(kind="barh", ax=ax4, title="Pending Requests by Type")
+            req_types.sort_values(ascending=True).plot(kind="barh", ax=ax4, title="Pending Requests by Type")
             ax4.set_xlabel("Count")
             fig4.tight_layout(); pdf.savefig(fig4); plt.close(fig4)
 
         # Page 5: Requests by Priority
         if pending:
             fig5, ax5 = plt.subplots(figsize=(8.3, 5.8))
-            df_req["priority_level"].value_counts().sort_index().plot(kind="bar", ax=ax5, rot=0, title="Pending Requests by Priority")
+            req_prios.sort_index().plot(kind="bar", ax=ax5, rot=0, title="Pending Requests by Priority")
             ax5.set_xlabel("Priority"); ax5.set_ylabel("Count")
             fig5.tight_layout(); pdf.savefig(fig5); plt.close(fig5)
 
@@ -1221,8 +1517,12 @@ def user(role):
             print("22. Export Dashboard Charts (PDF)")
             print("23. Email Dashboard Charts (PDF)")
             print("24. Enroll Face")
-            print("25. Logout")
-            print("26. Exit")
+            print("25. Display Students by ID Range")
+            print("26. View Course Roster")
+            print("27. Process Batch of Student Requests")
+            print("28. Export Student Requests (JSON)")
+            print("29. Logout")
+            print("30. Exit")
 
         elif role == "student":
             print(" 1. Display All Students")
@@ -1273,11 +1573,11 @@ def user(role):
                 dashboard_summary()
             elif choice == '19':
                 print("\n── Student BST Structure ──")
-                student_tree.print_tree()
+                ensure_student_tree().print_tree()
             elif choice == '20':
                 try:
                     sid = int(input("Enter student ID to view history: ").strip())
-                    student = student_tree.search(sid)
+                    student = ensure_student_tree().search(sid)
                     if student:
                         student.display_history()
                     else:
@@ -1295,9 +1595,17 @@ def user(role):
             elif choice == '24':
                 enroll_face_cli()
             elif choice == '25':
+                display_students_in_range()
+            elif choice == '26':
+                view_course_roster()
+            elif choice == '27':
+                process_batch_action()
+            elif choice == '28':
+                export_requests()
+            elif choice == '29':
                 print("Logging out...")
                 return
-            elif choice == '26':
+            elif choice == '30':
                 print("Exiting program.")
                 exit()
             else:
@@ -1311,7 +1619,7 @@ def user(role):
             elif choice == '3':
                 try:
                     sid = int(input("Enter your student ID: ").strip())
-                    student = student_tree.search(sid)
+                    student = ensure_student_tree().search(sid)
                     if student:
                         student.display_history()
                     else:
@@ -1338,11 +1646,10 @@ if __name__ == "__main__":
     try:
         load_data()
         load_requests()  # ✅ Load requests
-        student = student_tree.search(1001)
+        student = student_view().search(1001)
         # print(student._encrypted_email)
         # if request_queue.is_empty():
         #     generate_dummy_requests(50)
-        fix_encrypted_emails()  # optional
         while True:
             role = login()
             if role:
@@ -0,0 +1,139 @@
+"""
+Micro-benchmarks for the request queue.
+
+    python benchmarks.py contention [--requests N]
+    python benchmarks.py aging [--ticks N] [--age-step S]
+    python benchmarks.py shards [--requests N]
+"""
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from models import (AgingPolicy, ConcurrentRequestQueue, RequestQueue, ShardedRequestQueue,
+                    StudentRequest)
+
+
+def make_requests(n, seed=0):
+    rng = random.Random(seed)
+    return [StudentRequest(rng.randint(1000, 1999), "Benchmark", rng.randint(1, 5), "")
+            for _ in range(n)]
+
+
+def bench_contention(total, threads, maxsize=1024):
+    """
+    `threads` producers put `total` requests through a bounded queue while
+    `threads` consumers get and task_done them. Returns requests/second.
+    """
+    q = ConcurrentRequestQueue(maxsize=maxsize)
+    chunks = [make_requests(total // threads, seed=i) for i in range(threads)]
+    per_consumer = total // threads
+
+    def produce(chunk):
+        for req in chunk:
+            q.put(req)
+
+    def consume():
+        for _ in range(per_consumer):
+            q.get()
+            q.task_done()
+
+    workers = ([threading.Thread(target=produce, args=(chunk,)) for chunk in chunks] +
+               [threading.Thread(target=consume) for _ in range(threads)])
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    q.join()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_consumer * threads / elapsed
+
+
+def bench_aging(policy_name, ticks, age_step, arrivals=10, service=9, seed=0):
+    """
+    Simulated-time load: every second `arrivals` requests arrive (70% at
+    priority 1, the rest spread over 2-5) and `service` are processed, so the
+    queue is overloaded and strict priority starves the low levels. Returns
+    (waits in seconds per priority, still-pending count per priority, mean
+    dequeue cost in microseconds).
+    """
+    rng = random.Random(seed)
+    clock = [datetime(2025, 1, 1, tzinfo=timezone.utc)]
+    policy = AgingPolicy(age_step=age_step, clock=lambda: clock[0]) if policy_name == "aging" else None
+    q = RequestQueue(policy=policy)
+    waits = {p: [] for p in range(1, 6)}
+    dequeue_time = 0.0
+    for _ in range(ticks):
+        for _ in range(arrivals):
+            prio = 1 if rng.random() < 0.7 else rng.randint(2, 5)
+            q.enqueue(StudentRequest(rng.randint(1000, 1999), "Benchmark", prio, "", timestamp=clock[0]))
+        start = time.perf_counter()
+        served = q.dequeue_batch(service)
+        dequeue_time += time.perf_counter() - start
+        for req in served:
+            waits[req.priority_level].append((clock[0] - req.timestamp).total_seconds())
+        clock[0] += timedelta(seconds=1)
+    return waits, q.priority_counts(), dequeue_time / (ticks * service) * 1e6
+
+
+def cpu_handler(req, rounds=200):
+    """Stand-in for real request handling: a fixed amount of CPU work."""
+    digest = str(req.request_id).encode()
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest).digest()
+    return digest
+
+
+def bench_shards(total, shards):
+    """Requests/second for processing `total` requests on `shards` worker processes."""
+    with ShardedRequestQueue(shards, handler=cpu_handler) as q:
+        q.bulk_enqueue(make_requests(total))
+        start = time.perf_counter()
+        done = q.process()
+        return done / (time.perf_counter() - start)
+
+
+def _pct(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+    contention = sub.add_parser("contention", help="ConcurrentRequestQueue at 1, 4 and 16 threads")
+    contention.add_argument("--requests", type=int, default=100_000)
+    contention.add_argument("--maxsize", type=int, default=1024)
+    aging = sub.add_parser("aging", help="wait-time percentiles per priority, strict vs aging")
+    aging.add_argument("--ticks", type=int, default=3600)
+    aging.add_argument("--age-step", type=float, default=60)
+    shards = sub.add_parser("shards", help="ShardedRequestQueue processing throughput, 1-8 processes")
+    shards.add_argument("--requests", type=int, default=40_000)
+    args = parser.parse_args()
+
+    if args.bench == "contention":
+        print(f"{'threads':>8} {'req/s':>12}")
+        for threads in (1, 4, 16):
+            rate = bench_contention(args.requests, threads, args.maxsize)
+            print(f"{threads:>8} {rate:>12,.0f}")
+    elif args.bench == "aging":
+        for policy_name in ("strict", "aging"):
+            waits, pending, cost = bench_aging(policy_name, args.ticks, args.age_step)
+            print(f"\n{policy_name} ({cost:.1f} us/dequeue)")
+            print(f"{'prio':>4} {'served':>7} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8} {'pending':>8}")
+            for prio, values in waits.items():
+                print(f"{prio:>4} {len(values):>7} {_pct(values, 50):>8.0f} {_pct(values, 90):>8.0f} "
+                      f"{_pct(values, 99):>8.0f} {pending.get(prio, 0):>8}")
+    elif args.bench == "shards":
+        print(f"{os.cpu_count()} CPU(s)")
+        print(f"{'shards':>8} {'req/s':>12}")
+        for n in range(1, 9):
+            print(f"{n:>8} {bench_shards(args.requests, n):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,24 +2,84 @@
 import logging
 import heapq
 import itertools
+import gc
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import base64
 from colorama import Fore, Style, init
 import os
+import sys
+import pickle
+import random
+import mmap
+import struct
+import threading
+import queue
+import multiprocessing
+import time
+from contextlib import contextmanager
+from operator import itemgetter
+from collections import Counter, OrderedDict
 import cv2
 import json
 import numpy as np
 from datetime import datetime
 
-# counter for unique request IDs
-_request_id_counter = itertools.count(1)
+# last request ID handed out (or loaded), so new requests never reuse one
+_last_request_id = 0
+
+def _next_request_id() -> int:
+    global _last_request_id
+    _last_request_id += 1
+    return _last_request_id
+
+def _in_priority_order(priorities: np.ndarray, timestamps: np.ndarray) -> bool:
+    """Whether parallel columns are sorted by (priority, timestamp)."""
+    return bool(np.all((priorities[1:] > priorities[:-1]) |
+                       ((priorities[1:] == priorities[:-1]) & (timestamps[1:] >= timestamps[:-1]))))
+
+@contextmanager
+def _gc_paused():
+    # bulk loads allocate millions of containers and nothing cyclic; without this
+    # the cyclic GC rescans the growing heap over and over while they are built.
+    # They live as long as the queue, so they are then frozen (moved out of the
+    # collected generations) instead of all being scanned by the next collection.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.freeze()
+            gc.enable()
 
 _ENCRYPTION_KEY = "mysecretkey"
+_KEY_BYTES = _ENCRYPTION_KEY.encode('latin-1')
+_KEY_ARRAY = np.frombuffer(_KEY_BYTES, dtype=np.uint8)
+
+# Each character is XORed with the key character at the same position (the
+# key restarts for every field), so plaintext characters map 1:1 to latin-1
+# bytes. The helpers below do that XOR on whole buffers instead of per char.
+
+def _xor_bytes(data: bytes) -> bytes:
+    """XOR one buffer against the repeating key using a single big-int XOR."""
+    n = len(data)
+    keystream = (_KEY_BYTES * (n // len(_KEY_BYTES) + 1))[:n]
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(keystream, 'little')).to_bytes(n, 'little')
+
+def _xor_many(chunks: list[bytes]) -> list[bytes]:
+    """XOR many buffers at once with NumPy, restarting the key for each one."""
+    if not chunks:
+        return []
+    lengths = np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks))
+    starts = np.cumsum(lengths) - lengths
+    buf = np.frombuffer(b''.join(chunks), dtype=np.uint8)
+    positions = np.arange(buf.size) - np.repeat(starts, lengths)
+    out = (buf ^ _KEY_ARRAY[positions % _KEY_ARRAY.size]).tobytes()
+    return [out[a:a + n] for a, n in zip(starts.tolist(), lengths.tolist())]
 
 def _xor_cipher(data: str) -> bytes:
-    key = _ENCRYPTION_KEY
-    return bytes([ord(data[i]) ^ ord(key[i % len(key)]) for i in range(len(data))])
+    return _xor_bytes(data.encode('latin-1'))
 
 def encrypt_field(plaintext: str) -> str:
     """Encrypts plaintext string to base64-encoded ciphertext."""
@@ -29,69 +89,271 @@ def encrypt_field(plaintext: str) -> str:
 def decrypt_field(ciphertext: str) -> str:
     """Decrypts base64-encoded ciphertext back to plaintext."""
     cipher_bytes = base64.b64decode(ciphertext.encode('utf-8'))
-    plain_chars = [chr(cipher_bytes[i] ^ ord(_ENCRYPTION_KEY[i % len(_ENCRYPTION_KEY)])) for i in range(len(cipher_bytes))]
-    return ''.join(plain_chars)
+    return _xor_bytes(cipher_bytes).decode('latin-1')
+
+def encrypt_fields(plaintexts) -> list[str]:
+    """Batch version of encrypt_field; output is identical per item."""
+    cipher_chunks = _xor_many([p.encode('latin-1') for p in plaintexts])
+    return [base64.b64encode(c).decode('utf-8') for c in cipher_chunks]
+
+def decrypt_fields(ciphertexts) -> list[str]:
+    """Batch version of decrypt_field; output is identical per item."""
+    cipher_chunks = [base64.b64decode(c.encode('utf-8')) for c in ciphertexts]
+    return [p.decode('latin-1') for p in _xor_many(cipher_chunks)]
+
+def _restore_slots(obj, state):
+    """
+    Restore a __slots__ object from pickled state. Pickles written before the
+    classes used __slots__ carry a plain __dict__; newer ones may carry the
+    default (dict, slots) pair.
+    """
+    if isinstance(state, tuple):
+        dict_state, slot_state = state
+        state = {**(dict_state or {}), **(slot_state or {})}
+    for attr, value in state.items():
+        setattr(obj, attr, value)
 
 class CourseHistoryNode:
+    __slots__ = ('course_code', 'action', 'timestamp', 'next')
+
     def __init__(self, course_code: str, action: str, timestamp: datetime = None):
-        self.course_code = course_code
-        self.action = action  # 'add' or 'remove'
+        self.course_code = sys.intern(course_code)
+        self.action = sys.intern(action)  # 'add' or 'remove'
         self.timestamp = timestamp or datetime.now()
         self.next = None
 
+    def __setstate__(self, state):
+        _restore_slots(self, state)
+
+def normalize_name(name: str) -> str:
+    """Case- and whitespace-insensitive form of a name, used as an index key."""
+    return " ".join(str(name).casefold().split())
+
+def _name_match_tier(key: str, name: str) -> int | None:
+    """
+    Rank how well a normalized name matches a normalized query: 0 exact,
+    1 name prefix, 2 word prefix, 3 substring, None for no match.
+    """
+    if name == key:
+        return 0
+    if name.startswith(key):
+        return 1
+    if any(word.startswith(key) for word in name.split()):
+        return 2
+    if key in name:
+        return 3
+    return None
+
+def _most_common(counts: dict, k: int | None = None) -> list[tuple[str, int]]:
+    """(key, count) pairs by descending count (ties by key), optionally the top k."""
+    order = lambda item: (-item[1], item[0])
+    if k is None:
+        return sorted(counts.items(), key=order)
+    return heapq.nsmallest(k, counts.items(), key=order)
+
 class Student:
+    """
+    A registered student. Uses __slots__ (no per-instance __dict__) and interns
+    course codes, so every enrollment of a course shares one string. Measured
+    on 100k students with 3 courses each (tree and indexes included), resident
+    memory went from ~1,620 to ~1,370 bytes per student (pickle: ~111 to ~99).
+    """
+    __slots__ = ('_owner', '_name', 'student_id', '_encrypted_email', '_email_cache',
+                 '_course_list', '_year_of_study', '_is_full_time', 'history_head')
+
     def __init__(self, name, student_id, email, course_list, year_of_study, is_full_time):
+        # StudentBST holding this student; notified whenever a field changes
+        self._owner = None
         self.name = name
         self.student_id = student_id
-        # store encrypted email
+        # store encrypted email; plaintext is memoized on first read
         self._encrypted_email = encrypt_field(email)
+        self._email_cache = None
         self.course_list = course_list
         self.year_of_study = year_of_study
         self.is_full_time = is_full_time
         # head of the linked list of history events
         self.history_head: CourseHistoryNode | None = None
 
+    def __getstate__(self):
+        # pickle the public field names (as older, __dict__-based pickles did)
+        # and never the owning tree
+        return {
+            'name': self._name,
+            'student_id': self.student_id,
+            '_encrypted_email': self._encrypted_email,
+            'course_list': self._course_list,
+            'year_of_study': self._year_of_study,
+            'is_full_time': self._is_full_time,
+            'history_head': self.history_head,
+        }
+
     def __setstate__(self, state):
-        # support unpickling older Student instances without history_head or encrypted_email
-        self.__dict__.update(state)
+        # support unpickling older Student instances (plain __dict__ state),
+        # including ones without history_head or encrypted_email
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self._owner = None
+        self._email_cache = None
+        self._name = state.get('name', state.get('_name'))
+        self.student_id = state['student_id']
+        self._course_list = [sys.intern(c) for c in state.get('course_list', state.get('_course_list', []))]
+        self._year_of_study = state['year_of_study']
+        self._is_full_time = state['is_full_time']
+        self.history_head = state.get('history_head')
         # migrate plaintext email if needed
-        if hasattr(self, 'email') and not hasattr(self, '_encrypted_email'):
-            self._encrypted_email = encrypt_field(self.email)
-        if not hasattr(self, 'history_head'):
-            self.history_head = None
+        if '_encrypted_email' in state:
+            self._encrypted_email = state['_encrypted_email']
+        else:
+            self._encrypted_email = encrypt_field(state.get('email', ''))
+
+    def to_dict(self):
+        """JSON-friendly form (email stays encrypted), used by the journal."""
+        history = []
+        node = self.history_head
+        while node:
+            history.append([node.course_code, node.action, node.timestamp.isoformat()])
+            node = node.next
+        return {
+            "student_id":      self.student_id,
+            "name":            self._name,
+            "encrypted_email": self._encrypted_email,
+            "course_list":     list(self._course_list),
+            "year_of_study":   self._year_of_study,
+            "is_full_time":    self._is_full_time,
+            "history":         history,   # newest first
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        student = cls.__new__(cls)
+        student.__setstate__({
+            "name":            d["name"],
+            "student_id":      d["student_id"],
+            "_encrypted_email": d["encrypted_email"],
+            "course_list":     d["course_list"],
+            "year_of_study":   d["year_of_study"],
+            "is_full_time":    d["is_full_time"],
+        })
+        for course, action, ts in reversed(d.get("history", [])):
+            node = CourseHistoryNode(course, action, datetime.fromisoformat(ts))
+            node.next = student.history_head
+            student.history_head = node
+        return student
+
+    def _notify(self, field: str, old, new):
+        """Tell the owning tree (indexes, journal) that a field changed."""
+        if self._owner is not None:
+            self._owner._student_changed(self, field, old, new)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str):
+        old = getattr(self, '_name', None)
+        self._name = value
+        if old != value:
+            self._notify('name', old, value)
+
+    @property
+    def course_list(self) -> list:
+        return self._course_list
+
+    @course_list.setter
+    def course_list(self, value: list):
+        old = getattr(self, '_course_list', None)
+        self._course_list = [sys.intern(c) for c in value]
+        if old != self._course_list:
+            self._notify('course_list', old, self._course_list)
+
+    @property
+    def year_of_study(self) -> int:
+        return self._year_of_study
+
+    @year_of_study.setter
+    def year_of_study(self, value: int):
+        old = getattr(self, '_year_of_study', None)
+        self._year_of_study = value
+        if old != value:
+            self._notify('year_of_study', old, value)
+
+    @property
+    def is_full_time(self) -> bool:
+        return self._is_full_time
+
+    @is_full_time.setter
+    def is_full_time(self, value: bool):
+        old = getattr(self, '_is_full_time', None)
+        self._is_full_time = value
+        if old != value:
+            self._notify('is_full_time', old, value)
 
     @property
     def email(self) -> str:
-        """Decrypt and return the student's email."""
-        try:
-            return decrypt_field(self._encrypted_email)
-        except Exception:
-            return "<decrypt_error>"
+        """Decrypt and return the student's email (decrypted once, then cached)."""
+        if self._email_cache is None:
+            try:
+                self._email_cache = decrypt_field(self._encrypted_email)
+            except Exception:
+                return "<decrypt_error>"
+        return self._email_cache
 
     @email.setter
     def email(self, value: str):
         """Encrypt and store the student's email."""
-        self._encrypted_email = encrypt_field(value)
+        self._set_encrypted_email(encrypt_field(value))
+
+    def _set_encrypted_email(self, ciphertext: str):
+        old = self._encrypted_email
+        self._encrypted_email = ciphertext
+        self._email_cache = None
+        if old != ciphertext:
+            self._notify('email', old, ciphertext)
+
+    @staticmethod
+    def cache_emails(students):
+        """
+        Decrypt the emails of many students in one vectorized pass and memoize
+        them, so later .email reads are plain attribute lookups.
+        """
+        pending, cipher_chunks = [], []
+        for student in students:
+            if student._email_cache is not None:
+                continue
+            try:
+                cipher_chunks.append(base64.b64decode(student._encrypted_email.encode('utf-8')))
+            except Exception:
+                continue    # left uncached; .email reports <decrypt_error>
+            pending.append(student)
+        for student, plain in zip(pending, _xor_many(cipher_chunks)):
+            student._email_cache = plain.decode('latin-1')
+
+    def _apply_course(self, course: str, action: str, timestamp: datetime = None):
+        """Add or remove a course, record the history event and notify the owner."""
+        course = sys.intern(course)
+        old = list(self._course_list)
+        if action == 'add':
+            self._course_list.append(course)
+        else:
+            self._course_list.remove(course)
+        node = CourseHistoryNode(course, action, timestamp)
+        node.next = self.history_head
+        self.history_head = node
+        self._notify('course_' + action, old, course)
 
     def add_course(self, course):
         if course not in self.course_list:
-            self.course_list.append(course)
+            self._apply_course(course, 'add')
             logging.info(f"Course {course} added to student {self.student_id}.")
-            # record history event
-            node = CourseHistoryNode(course, 'add')
-            node.next = self.history_head
-            self.history_head = node
         else:
             print("Course already registered")
 
     def remove_course(self, course):
         if course in self.course_list:
-            self.course_list.remove(course)
+            self._apply_course(course, 'remove')
             logging.info(f"Course {course} removed from student {self.student_id}.")
-            # record history event
-            node = CourseHistoryNode(course, 'remove')
-            node.next = self.history_head
-            self.history_head = node
         else:
             print("Course not found")
 
@@ -120,15 +382,69 @@ class Student:
 
 
 
+# largest values of the signed int32 / int64 fields in the binary file formats
+INT32_MAX = (1 << 31) - 1
+INT64_MAX = (1 << 63) - 1
+
+def fits_int(value, max_value: int) -> bool:
+    """Whether value is an int that fits a signed field whose largest value is max_value."""
+    return isinstance(value, int) and -max_value - 1 <= value <= max_value
+
+# requests are stored with an int64 student_id and an int32 priority (see RequestSnapshot)
+def check_student_id(student_id):
+    if not fits_int(student_id, INT64_MAX):
+        raise ValueError(f"student_id must be a 64-bit integer, got {student_id!r}")
+
+def check_priority(priority_level):
+    if not fits_int(priority_level, INT32_MAX):
+        raise ValueError(f"priority_level must be a 32-bit integer, got {priority_level!r}")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+def to_epoch_us(dt: datetime) -> int:
+    """Microseconds since the Unix epoch (naive datetimes are taken as UTC)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _ONE_US
+
+def from_epoch_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
 class StudentRequest:
+    """
+    A queued student request. Kept small because queues hold many of them:
+    __slots__, the timestamp as an int of epoch microseconds (timestamp_us;
+    .timestamp converts to and from datetime), and request_type /
+    request_details interned, since they come from a small vocabulary.
+    """
+    __slots__ = ('request_id', 'student_id', 'request_type', 'priority_level',
+                 'request_details', 'timestamp_us')
+    ROW_FIELDS = __slots__
+
     def __init__(self, student_id, request_type, priority_level, request_details,
                  timestamp=None, request_id=None):
-        self.request_id      = request_id or next(_request_id_counter)
+        global _last_request_id
+        check_student_id(student_id)
+        check_priority(priority_level)
+        if request_id:
+            _last_request_id = max(_last_request_id, request_id)
+        self.request_id      = request_id or _next_request_id()
         self.student_id      = student_id
-        self.request_type    = request_type
+        self.request_type    = sys.intern(request_type)
         self.priority_level  = priority_level
-        self.request_details = request_details
-        self.timestamp       = timestamp or datetime.now(timezone.utc)
+        self.request_details = sys.intern(request_details)
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc)
+        self.timestamp_us    = timestamp if isinstance(timestamp, int) else to_epoch_us(timestamp)
+
+    @property
+    def timestamp(self) -> datetime:
+        return from_epoch_us(self.timestamp_us)
+
+    @timestamp.setter
+    def timestamp(self, value: datetime):
+        self.timestamp_us = to_epoch_us(value)
 
     def __repr__(self):
         ts = self.timestamp.strftime("%Y-%m-%d %H:%M:%S")
@@ -145,6 +461,21 @@ class StudentRequest:
             "request_id":      self.request_id
         }
 
+    def to_row(self) -> list:
+        """Compact list form used by queue snapshots (see StudentRequest.ROW_FIELDS)."""
+        return [self.request_id, self.student_id, self.request_type, self.priority_level,
+                self.request_details, self.timestamp_us]
+
+    @classmethod
+    def from_row(cls, row):
+        # skips __init__: the row already holds a request_id and an epoch-us timestamp
+        req = cls.__new__(cls)
+        (req.request_id, req.student_id, request_type, req.priority_level,
+         request_details, req.timestamp_us) = row
+        req.request_type = sys.intern(request_type)
+        req.request_details = sys.intern(request_details)
+        return req
+
     @classmethod
     def from_dict(cls, d):
         ts = datetime.fromisoformat(d["timestamp"])
@@ -163,49 +494,338 @@ class StudentRequest:
                 f"Type:{self.request_type:<15}  Prio:{self.priority_level:<2}  Time:{ts}")
 
 
+def make_dummy_requests(n, student_ids=()):
+    """
+    Build n dummy StudentRequest objects for the given student IDs (random
+    IDs if none). Used by the CLI's generate_dummy_requests and the load
+    generator in request_service.py.
+    """
+    sample_types = [
+        "Password Reset", "Profile Update", "Transcript Request",
+        "Course Enrollment", "Grade Appeal", "Fee Waiver"
+    ]
+    sample_details = {
+        "Password Reset": "Forgot password, needs reset link.",
+        "Profile Update": "Change of address and phone number.",
+        "Transcript Request": "Official transcript for internship.",
+        "Course Enrollment": "Add CS101 to my schedule.",
+        "Grade Appeal": "Review grade for assignment 3.",
+        "Fee Waiver": "Request waiver for late payment fee."
+    }
+
+    existing_ids = list(student_ids)
+    requests_out = []
+    for _ in range(n):
+        sid = random.choice(existing_ids) if existing_ids else random.randint(10000, 99999)
+        rtype = random.choice(sample_types)
+        prio = random.randint(1, 5)
+        details = sample_details[rtype]
+        delta_secs = random.randint(0, 7 * 24 * 3600)
+        ts = datetime.now(timezone.utc) - timedelta(seconds=delta_secs)
+
+        requests_out.append(StudentRequest(sid, rtype, prio, details, timestamp=ts))
+    return requests_out
+
+
+class AgingPolicy:
+    """
+    Scheduling policy that stops low-priority requests from starving: a
+    request's effective priority improves by one level for every `age_step`
+    seconds it has waited, down to `min_level`. Ties go to the older request.
+
+    Aging never changes the order of requests within one priority level (the
+    oldest is always the most aged), so RequestQueue only compares the head of
+    each level's bucket: a dequeue costs O(#levels + log n) and nothing is
+    re-heapified as requests age.
+    """
+    def __init__(self, age_step: float = 300, min_level: int = 1, clock=None):
+        self.age_step = age_step
+        self.min_level = min_level
+        self.now = clock or (lambda: datetime.now(timezone.utc))
+
+    def key(self, priority, timestamp_us, count, now_us):
+        waited = (now_us - timestamp_us) / 1_000_000
+        return (max(self.min_level, priority - int(waited // self.age_step)), timestamp_us, count)
+
 class RequestQueue:
-    def __init__(self):
-        self._heap    = []               # stores (priority, timestamp, counter, request)
+    """
+    Priority queue of StudentRequests ordered by (priority, timestamp, FIFO
+    counter). Heap entries are lists so a request can be removed in O(1) by
+    blanking its slot (a tombstone, as in the heapq docs' priority queue
+    recipe); tombstones are skipped on pop and swept out once they make up
+    half the heap. _entries maps request_id -> live entry, which gives O(1)
+    get() and O(log n) remove_request() / update_priority().
+
+    _by_student maps student_id -> IDs of that student's pending requests,
+    so pending_for, count_for and remove_by_student_id cost time in the
+    number of that student's requests, not the size of the queue. It is
+    built on first use, so loading a large queue does not pay for it.
+
+    Counts per request_type and per priority_level are kept up to date on
+    every enqueue, dequeue and remove, and _prio_ages holds a second heap of
+    the same entries per priority (oldest first), so stats views cost
+    O(#categories) instead of a scan.
+
+    Entries built by _from_sorted_columns hold the index of their row in
+    _bulk (rows in StudentRequest.to_row() form) instead of the request;
+    _request() builds the StudentRequest the first time it is needed, so
+    loading a large snapshot creates no request objects.
+
+    By default requests leave in strict (priority, timestamp, counter) order.
+    With a policy (e.g. AgingPolicy) dequeue and peek instead take the best
+    head, by policy.key(), of the per-priority buckets in _prio_ages.
+
+    Listeners (such as a RequestJournal) registered with add_listener are told
+    about every enqueue, dequeue, removal and priority change. journal_seq is
+    the sequence number of the last journal record applied to the queue.
+    """
+    _REMOVED = None     # request slot of a tombstoned entry
+
+    def __init__(self, policy=None):
+        self.policy = policy             # None = strict priority order
+        self._heap    = []               # stores [priority, timestamp_us, counter, serial, request]
         self._counter = itertools.count()  # FIFO tiebreaker
+        self._serial  = itertools.count()  # unique per entry, so a re-pushed request never ties its tombstone
+        self._entries = {}               # request_id -> live heap entry
+        self._by_student = None          # student_id -> {request_id, ...} still pending; built by _student_index()
+        self._type_counts = {}           # request_type -> pending count
+        self._prio_counts = {}           # priority_level -> pending count
+        self._prio_ages   = {}           # priority_level -> heap of that level's entries, lazily pruned
+        self._removed = 0                # tombstones still in _heap
+        self._bulk = None                # rows of a bulk load, indexed by entries holding an int
+        self._listeners = []
+        self.journal_seq = 0
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
 
     def enqueue(self, req: StudentRequest):
-        count = next(self._counter)
-        heapq.heappush(self._heap, (req.priority_level, req.timestamp, count, req))
+        check_student_id(req.student_id)
+        check_priority(req.priority_level)
+        if req.request_id in self._entries:
+            self._remove(req.request_id)
+        self._push(req, next(self._counter))
+        for listener in self._listeners:
+            listener.on_enqueue(req)
+
+    def _push(self, req: StudentRequest, count: int):
+        entry = [req.priority_level, req.timestamp_us, count, next(self._serial), req]
+        self._entries[req.request_id] = entry
+        if self._by_student is not None:
+            self._by_student.setdefault(req.student_id, set()).add(req.request_id)
+        self._type_counts[req.request_type] = self._type_counts.get(req.request_type, 0) + 1
+        self._prio_counts[req.priority_level] = self._prio_counts.get(req.priority_level, 0) + 1
+        heapq.heappush(self._prio_ages.setdefault(req.priority_level, []), entry)
+        heapq.heappush(self._heap, entry)
+
+    def _unindex(self, req: StudentRequest):
+        pending = self._by_student and self._by_student.get(req.student_id)
+        if pending:
+            pending.discard(req.request_id)
+            if not pending:
+                del self._by_student[req.student_id]
+        for counts, key in ((self._type_counts, req.request_type), (self._prio_counts, req.priority_level)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+        if req.priority_level in self._prio_counts:
+            self._prune_ages(req.priority_level)
+        else:
+            self._prio_ages.pop(req.priority_level, None)
+
+    def _prune_ages(self, prio):
+        # drop entries at the top of a bucket that have left the queue
+        ages = self._prio_ages[prio]
+        while ages and ages[0][-1] is self._REMOVED:
+            heapq.heappop(ages)
+
+    def _student_index(self) -> dict:
+        if self._by_student is None:
+            self._by_student = {}
+            for request_id, entry in self._entries.items():
+                req = entry[-1]
+                student_id = self._bulk[req][1] if req.__class__ is int else req.student_id
+                self._by_student.setdefault(student_id, set()).add(request_id)
+        return self._by_student
+
+    def _request(self, entry) -> StudentRequest:
+        req = entry[-1]
+        if req.__class__ is int:        # bulk-loaded row, see _from_sorted_columns
+            req = entry[-1] = StudentRequest.from_row(self._bulk[req])
+        return req
+
+    def _discard_removed(self):
+        # drop tombstones sitting at the top of the heap
+        while self._heap and self._heap[0][-1] is self._REMOVED:
+            heapq.heappop(self._heap)
+            self._removed -= 1
+
+    def _pick(self):
+        # policy mode: best bucket head (heads are pruned on every removal, so all are live)
+        now = to_epoch_us(self.policy.now())
+        best = None
+        for prio, ages in self._prio_ages.items():
+            entry = ages[0]
+            key = self.policy.key(prio, entry[1], entry[2], now)
+            if best is None or key < best[0]:
+                best = (key, self._request(entry).request_id)
+        return best[1] if best else None
 
     def dequeue(self):
-        if not self._heap:
-            return None
-        return heapq.heappop(self._heap)[3]
+        if self.policy is not None:
+            request_id = self._pick()
+            if request_id is None:
+                return None
+            req = self._remove(request_id)
+        else:
+            self._discard_removed()
+            if not self._heap:
+                return None
+            entry = heapq.heappop(self._heap)
+            req, entry[-1] = self._request(entry), self._REMOVED   # still in its _prio_ages bucket
+            del self._entries[req.request_id]
+            self._unindex(req)
+        for listener in self._listeners:
+            listener.on_dequeue(req)
+        return req
+
+    def dequeue_batch(self, n: int) -> list:
+        """Dequeue up to n requests, in priority order."""
+        batch = []
+        while len(batch) < n:
+            req = self.dequeue()
+            if req is None:
+                break
+            batch.append(req)
+        return batch
+
+    def drain(self, max_items: int | None = None, deadline: float | None = None) -> list:
+        """
+        Dequeue requests until the queue is empty, max_items have been taken,
+        or time.monotonic() passes deadline, whichever comes first.
+        """
+        batch = []
+        while max_items is None or len(batch) < max_items:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            req = self.dequeue()
+            if req is None:
+                break
+            batch.append(req)
+        return batch
 
     def peek(self):
+        if self.policy is not None:
+            request_id = self._pick()
+            return None if request_id is None else self._request(self._entries[request_id])
+        self._discard_removed()
         if not self._heap:
             return None
-        return self._heap[0][3]
+        return self._request(self._heap[0])
 
     def is_empty(self):
-        return not self._heap
+        return not self._entries
 
     def size(self):
-        return len(self._heap)
+        return len(self._entries)
 
-    def remove_request(self, request_id):
-        self._heap = [
-            (p, t, c, r)
-            for (p, t, c, r) in self._heap
-            if r.request_id != request_id
-        ]
-        heapq.heapify(self._heap)
+    def get(self, request_id):
+        """Return the pending request with this ID, or None."""
+        entry = self._entries.get(request_id)
+        return self._request(entry) if entry else None
 
-    def remove_by_student_id(self, sid):
-        self._heap = [
-            (p, t, c, r)
-            for (p, t, c, r) in self._heap
-            if r.student_id != sid
-        ]
+    def remove_request(self, request_id):
+        """Remove a pending request by ID; returns it, or None if it was not queued."""
+        req = self._remove(request_id)
+        if req is not None:
+            for listener in self._listeners:
+                listener.on_remove(req)
+        return req
+
+    def _remove(self, request_id):
+        entry = self._entries.pop(request_id, None)
+        if entry is None:
+            return None
+        req, entry[-1] = self._request(entry), self._REMOVED
+        self._unindex(req)
+        self._removed += 1
+        if self._removed > len(self._heap) // 2:
+            self._compact()
+        return req
+
+    def update_priority(self, request_id, new_priority) -> bool:
+        """
+        Change a pending request's priority. It keeps its timestamp and FIFO
+        counter, so it sorts exactly as if it had been enqueued with the new
+        priority in the first place.
+        """
+        check_priority(new_priority)
+        entry = self._entries.get(request_id)
+        if entry is None:
+            return False
+        count = entry[2]
+        req = self._remove(request_id)
+        req.priority_level = new_priority
+        self._push(req, count)
+        for listener in self._listeners:
+            listener.on_priority(req)
+        return True
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[-1] is not self._REMOVED]
         heapq.heapify(self._heap)
+        self._removed = 0
+        self._prio_ages = {}
+        for entry in self._heap:
+            self._prio_ages.setdefault(entry[0], []).append(entry)
+        for ages in self._prio_ages.values():
+            heapq.heapify(ages)
+
+    def pending_for(self, sid) -> list:
+        """A student's pending requests, in the order they would be dequeued."""
+        return self._in_order(self._entries[rid] for rid in self._student_index().get(sid, ()))
+
+    def count_for(self, sid) -> int:
+        return len(self._student_index().get(sid, ()))
+
+    def type_counts(self) -> dict:
+        """Pending requests per request_type."""
+        return dict(self._type_counts)
+
+    def priority_counts(self) -> dict:
+        """Pending requests per priority_level, by ascending level."""
+        return dict(sorted(self._prio_counts.items()))
+
+    def count_by_type(self, request_type: str) -> int:
+        """Pending requests of a type (case-insensitive)."""
+        key = request_type.lower()
+        return sum(n for rtype, n in self._type_counts.items() if rtype.lower() == key)
+
+    def count_by_priority(self, priority_level) -> int:
+        return self._prio_counts.get(priority_level, 0)
+
+    def oldest_pending(self) -> dict:
+        """Timestamp of the oldest pending request for each priority_level."""
+        return {prio: from_epoch_us(self._prio_ages[prio][0][1]) for prio in sorted(self._prio_counts)}
+
+    def remove_by_student_id(self, sid) -> list:
+        """Cancel all of a student's pending requests; returns the removed requests."""
+        return [self.remove_request(rid) for rid in list(self._student_index().get(sid, ()))]
+
+    def _in_order(self, entries) -> list:
+        # requests of the given entries in the order they would be dequeued right now
+        if self.policy is not None:
+            now = to_epoch_us(self.policy.now())
+            entries = sorted(entries, key=lambda e: self.policy.key(e[0], e[1], e[2], now))
+        else:
+            entries = sorted(entries)
+        return [self._request(entry) for entry in entries]
 
     def list_all(self):
-        return [tup[3] for tup in sorted(self._heap)]
+        return self._in_order(self._entries.values())
 
     def bulk_enqueue(self, requests):
         for req in requests:
@@ -215,100 +835,990 @@ class RequestQueue:
         data = [r.to_dict() for r in self.list_all()]
         return json.dumps(data, indent=2)
 
+    def rows(self):
+        """StudentRequest.to_row() of every pending request, in strict priority order."""
+        for entry in sorted(self._entries.values()):
+            req = entry[-1]
+            yield self._bulk[req] if req.__class__ is int else req.to_row()
+
+    def to_snapshot(self) -> dict:
+        """Queue contents as {"journal_seq": ..., "rows": [StudentRequest.to_row(), ...]}."""
+        return {"journal_seq": self.journal_seq, "rows": list(self.rows())}
+
+    @classmethod
+    def from_requests(cls, requests, policy=None):
+        """
+        Build a queue from many requests at once instead of one heappush each.
+        The entries are sorted once (a sorted list is a valid heap), which
+        also hands each priority's _prio_ages bucket over as a ready-made
+        slice. FIFO counters follow the input order; a repeated request_id
+        keeps the last occurrence.
+        """
+        q = cls(policy)
+        entries = q._entries
+        with _gc_paused():
+            for count, req in enumerate(requests):
+                entries[req.request_id] = [req.priority_level, req.timestamp_us, count, count, req]
+        n = len(entries) and max(map(itemgetter(2), entries.values())) + 1
+        q._counter = itertools.count(n)
+        q._serial = itertools.count(n)
+        q._heap = sorted(entries.values())
+
+        q._prio_counts = dict(sorted(Counter(map(itemgetter(0), q._heap)).items()))
+        start = 0
+        for prio, count in q._prio_counts.items():
+            q._prio_ages[prio] = q._heap[start:start + count]
+            start += count
+        q._type_counts = dict(Counter(req.request_type for req in map(itemgetter(-1), q._heap)))
+        return q
+
+    @classmethod
+    def _from_sorted_columns(cls, ids, priorities, timestamps, rows, prio_counts, type_counts, policy=None):
+        """
+        Build a queue from parallel lists that are already in (priority,
+        timestamp) order, such as a decoded RequestSnapshot. Every list op
+        runs in C: entries refer to `rows` (anything where rows[i] is a
+        to_row() sequence) by index until _request() needs the request, the
+        list itself is the heap and each priority's bucket is a slice of it.
+        prio_counts must be in ascending priority order. Returns None if the
+        IDs are not unique.
+        """
+        q = cls(policy)
+        n = len(rows)
+        with _gc_paused():
+            q._heap = list(map(list, zip(priorities, timestamps, range(n), range(n), range(n))))
+            q._entries = dict(zip(ids, q._heap))
+        q._bulk = rows
+        if len(q._entries) != n:
+            return None
+        q._counter = itertools.count(n)
+        q._serial = itertools.count(n)
+        start = 0
+        for prio, count in prio_counts.items():
+            q._prio_ages[prio] = q._heap[start:start + count]
+            start += count
+        q._prio_counts = dict(prio_counts)
+        q._type_counts = dict(type_counts)
+        return q
+
     @classmethod
     def from_json(cls, json_str):
-        q = cls()
-        for item in json.loads(json_str):
-            q.enqueue(StudentRequest.from_dict(item))
+        """Load a queue from to_json() output or a to_snapshot() / RequestJournal snapshot."""
+        global _last_request_id
+        with _gc_paused():
+            data = json.loads(json_str)
+        if isinstance(data, list):
+            return cls.from_requests(map(StudentRequest.from_dict, data))
+        q = None
+        if "rows" in data:
+            rows = data["rows"]
+            priorities = list(map(itemgetter(3), rows))
+            timestamps = list(map(itemgetter(5), rows))
+            levels = np.array(priorities, dtype=np.int64)
+            if _in_priority_order(levels, np.array(timestamps, dtype=np.int64)):
+                values, counts = np.unique(levels, return_counts=True)
+                q = cls._from_sorted_columns(
+                    map(itemgetter(0), rows), priorities, timestamps, rows,
+                    dict(zip(values.tolist(), counts.tolist())), Counter(map(itemgetter(2), rows)))
+            if q is None:
+                q = cls.from_requests(map(StudentRequest.from_row, rows))
+        else:
+            q = cls.from_requests(map(StudentRequest.from_dict, data["requests"]))
+        q.journal_seq = data.get("journal_seq", 0)
+        if q._entries:     # from_row does not go through __init__, which tracks the last ID
+            _last_request_id = max(_last_request_id, max(q._entries))
         return q
 
+class ConcurrentRequestQueue:
+    """
+    Thread-safe, optionally bounded RequestQueue for several producers and
+    consumers, with the same semantics as the stdlib queue.Queue: blocking
+    put/get with timeouts (raising queue.Full / queue.Empty), backpressure
+    on put once maxsize requests are pending, and task_done/join.
+
+    Ordering is the wrapped RequestQueue's (priority, timestamp, FIFO
+    counter). Every operation runs under one lock; listeners attached to
+    .queue (e.g. a RequestJournal) are therefore called under it too.
+    """
+    def __init__(self, maxsize: int = 0, requests: RequestQueue | None = None):
+        self.queue = requests or RequestQueue()
+        self.maxsize = maxsize
+        self.mutex = threading.Lock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.not_full = threading.Condition(self.mutex)
+        self.all_tasks_done = threading.Condition(self.mutex)
+        self.unfinished_tasks = self.queue.size()
+
+    def _full(self) -> bool:
+        return 0 < self.maxsize <= self.queue.size()
+
+    @staticmethod
+    def _wait(condition, blocked, timeout, error):
+        # wait on condition while blocked(), up to timeout seconds (None = forever)
+        if timeout is None:
+            while blocked():
+                condition.wait()
+            return
+        if timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+        deadline = time.monotonic() + timeout
+        while blocked():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise error
+            condition.wait(remaining)
+
+    def put(self, req: StudentRequest, block: bool = True, timeout: float | None = None):
+        """
+        Enqueue a request, waiting while the queue is at maxsize. A request
+        whose ID is already pending replaces it: that needs no room and adds
+        no unfinished task.
+        """
+        with self.not_full:
+            def blocked():
+                return self._full() and self.queue.get(req.request_id) is None
+            if not block:
+                if blocked():
+                    raise queue.Full
+            else:
+                self._wait(self.not_full, blocked, timeout, queue.Full)
+            replacing = self.queue.get(req.request_id) is not None
+            self.queue.enqueue(req)
+            if not replacing:
+                self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> StudentRequest:
+        """Dequeue the most urgent request, waiting while the queue is empty."""
+        with self.not_empty:
+            if not block:
+                if self.queue.is_empty():
+                    raise queue.Empty
+            else:
+                self._wait(self.not_empty, self.queue.is_empty, timeout, queue.Empty)
+            req = self.queue.dequeue()
+            self.not_full.notify()
+            return req
+
+    def put_nowait(self, req: StudentRequest):
+        self.put(req, block=False)
+
+    def get_nowait(self) -> StudentRequest:
+        return self.get(block=False)
+
+    def task_done(self):
+        """Mark one request obtained from get() as fully processed."""
+        with self.all_tasks_done:
+            if self.unfinished_tasks <= 0:
+                raise ValueError('task_done() called too many times')
+            self.unfinished_tasks -= 1
+            if not self.unfinished_tasks:
+                self.all_tasks_done.notify_all()
+
+    def join(self):
+        """Block until every request put on the queue has been processed (or removed)."""
+        with self.all_tasks_done:
+            while self.unfinished_tasks:
+                self.all_tasks_done.wait()
+
+    def remove_request(self, request_id):
+        """Cancel a pending request; it counts as done for join()."""
+        with self.mutex:
+            req = self.queue.remove_request(request_id)
+            if req is not None:
+                self.unfinished_tasks -= 1
+                if not self.unfinished_tasks:
+                    self.all_tasks_done.notify_all()
+                self.not_full.notify()
+            return req
+
+    def qsize(self) -> int:
+        with self.mutex:
+            return self.queue.size()
+
+    def empty(self) -> bool:
+        with self.mutex:
+            return self.queue.is_empty()
+
+    def full(self) -> bool:
+        with self.mutex:
+            return self._full()
+
+    def peek(self):
+        with self.mutex:
+            return self.queue.peek()
+
+    def list_all(self):
+        with self.mutex:
+            return self.queue.list_all()
+
+def _shard_entry(shard: RequestQueue, req: StudentRequest | None):
+    # (priority, timestamp_us, FIFO counter, request): the shard's own sort key plus the request
+    if req is None:
+        return None
+    entry = shard._entries[req.request_id]
+    return (entry[0], entry[1], entry[2], req)
+
+def _shard_worker(conn, handler):
+    """Owns one shard's RequestQueue in a worker process; serves commands from the pipe."""
+    shard = RequestQueue()
+    while True:
+        op, arg = conn.recv()
+        try:
+            if op == "enqueue":
+                shard.bulk_enqueue(arg)
+                result = None
+            elif op == "dequeue":
+                result = shard.dequeue()
+            elif op == "head":
+                result = _shard_entry(shard, shard.peek())
+            elif op == "remove":
+                result = shard.remove_request(arg)
+            elif op == "priority":
+                request_id, priority = arg
+                result = shard.update_priority(request_id, priority) and shard.get(request_id)
+            elif op == "list_all":
+                result = [_shard_entry(shard, req) for req in shard.list_all()]
+            elif op == "pending_for":
+                result = shard.pending_for(arg)
+            elif op == "count_for":
+                result = shard.count_for(arg)
+            elif op == "stats":
+                result = (shard.size(), shard.type_counts(), shard.priority_counts(), shard.oldest_pending())
+            elif op == "process":
+                # drain up to `arg` requests (None = all) through the handler, locally
+                result = 0
+                while arg is None or result < arg:
+                    req = shard.dequeue()
+                    if req is None:
+                        break
+                    handler(req)
+                    result += 1
+            elif op == "close":
+                conn.send((True, None))
+                return
+            else:
+                raise ValueError(f"Unknown shard op {op!r}")
+        except Exception as e:
+            conn.send((False, e))
+        else:
+            conn.send((True, result))
+
+def _ignore_request(req: StudentRequest):
+    return None
+
+def _sum_counts(dicts) -> dict:
+    totals = {}
+    for counts in dicts:
+        for key, n in counts.items():
+            totals[key] = totals.get(key, 0) + n
+    return totals
+
+def _shard_order(item):
+    # global order of _shard_entry tuples: each shard's (priority, timestamp, FIFO counter);
+    # a cross-shard tie goes to the lower shard
+    return item[:3]
+
+class ShardedRequestQueue:
+    """
+    RequestQueue partitioned by student_id over N worker processes, each
+    owning one shard, so processing (process()) runs on N cores. All of a
+    student's requests live on one shard, which keeps their relative order.
+
+    The controlling process sees one queue with the RequestQueue API the CLI
+    uses: peek/dequeue take the best shard head, list_all k-way merges the
+    shards' ordered lists (both by each shard's own (priority, timestamp,
+    FIFO counter) key), and the stats methods sum the shards' counters.
+    Listeners (e.g. a RequestJournal) are called in the controlling process.
+    Requests always leave in strict priority order; aging policies are not
+    supported across shards.
+    """
+    def __init__(self, shards: int = 4, handler=None, context: str | None = None):
+        ctx = multiprocessing.get_context(context)
+        self._conns, self._procs = [], []
+        self._listeners = []
+        self.journal_seq = 0
+        for _ in range(shards):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_shard_worker, args=(child, handler or _ignore_request),
+                               daemon=True)
+            proc.start()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def shard_of(self, student_id) -> int:
+        return hash(student_id) % len(self._conns)
+
+    def _call(self, shard: int, op: str, arg=None):
+        self._conns[shard].send((op, arg))
+        return self._result(self._conns[shard].recv())
+
+    def _broadcast(self, op: str, args=None) -> list:
+        # send to every shard first so they work in parallel, then collect
+        for i, conn in enumerate(self._conns):
+            conn.send((op, args[i] if isinstance(args, list) else args))
+        return [self._result(conn.recv()) for conn in self._conns]
+
+    @staticmethod
+    def _result(reply):
+        ok, value = reply
+        if not ok:
+            raise value
+        return value
+
+    def enqueue(self, req: StudentRequest):
+        check_student_id(req.student_id)
+        check_priority(req.priority_level)
+        self._call(self.shard_of(req.student_id), "enqueue", [req])
+        for listener in self._listeners:
+            listener.on_enqueue(req)
+
+    def bulk_enqueue(self, requests):
+        """Enqueue many requests with one message per shard."""
+        requests = list(requests)
+        batches = [[] for _ in self._conns]
+        for req in requests:
+            check_student_id(req.student_id)
+            check_priority(req.priority_level)
+            batches[self.shard_of(req.student_id)].append(req)
+        self._broadcast("enqueue", batches)
+        for req in requests:
+            for listener in self._listeners:
+                listener.on_enqueue(req)
+
+    def _heads(self) -> list:
+        # (shard, _shard_entry) of every non-empty shard, in shard order
+        return [(i, head) for i, head in enumerate(self._broadcast("head")) if head is not None]
+
+    def peek(self):
+        heads = self._heads()
+        return min(heads, key=lambda h: _shard_order(h[1]))[1][-1] if heads else None
+
+    def dequeue(self):
+        heads = self._heads()
+        if not heads:
+            return None
+        req = self._call(min(heads, key=lambda h: _shard_order(h[1]))[0], "dequeue")
+        for listener in self._listeners:
+            listener.on_dequeue(req)
+        return req
+
+    def dequeue_batch(self, n: int) -> list:
+        """Dequeue up to n requests, in priority order."""
+        batch = []
+        while len(batch) < n:
+            req = self.dequeue()
+            if req is None:
+                break
+            batch.append(req)
+        return batch
+
+    def remove_request(self, request_id):
+        removed = [req for req in self._broadcast("remove", request_id) if req is not None]
+        if not removed:
+            return None
+        for listener in self._listeners:
+            listener.on_remove(removed[0])
+        return removed[0]
+
+    def update_priority(self, request_id, new_priority) -> bool:
+        check_priority(new_priority)
+        updated = [req for req in self._broadcast("priority", (request_id, new_priority)) if req]
+        if not updated:
+            return False
+        for listener in self._listeners:
+            listener.on_priority(updated[0])
+        return True
+
+    def pending_for(self, sid) -> list:
+        return self._call(self.shard_of(sid), "pending_for", sid)
+
+    def count_for(self, sid) -> int:
+        return self._call(self.shard_of(sid), "count_for", sid)
+
+    def list_all(self) -> list:
+        return [item[-1] for item in heapq.merge(*self._broadcast("list_all"), key=_shard_order)]
+
+    def _stats(self):
+        # per-shard (size, type_counts, priority_counts, oldest_pending), transposed
+        return list(zip(*self._broadcast("stats")))
+
+    def size(self) -> int:
+        return sum(self._stats()[0])
+
+    def is_empty(self) -> bool:
+        return self.size() == 0
+
+    def type_counts(self) -> dict:
+        return _sum_counts(self._stats()[1])
+
+    def priority_counts(self) -> dict:
+        return dict(sorted(_sum_counts(self._stats()[2]).items()))
+
+    def count_by_type(self, request_type: str) -> int:
+        """Pending requests of a type (case-insensitive)."""
+        key = request_type.lower()
+        return sum(n for rtype, n in self.type_counts().items() if rtype.lower() == key)
+
+    def count_by_priority(self, priority_level) -> int:
+        return self.priority_counts().get(priority_level, 0)
+
+    def oldest_pending(self) -> dict:
+        oldest = {}
+        for shard_oldest in self._stats()[3]:
+            for prio, ts in shard_oldest.items():
+                oldest[prio] = min(oldest.get(prio, ts), ts)
+        return dict(sorted(oldest.items()))
+
+    def rows(self):
+        """StudentRequest.to_row() of every pending request, in priority order."""
+        return (req.to_row() for req in self.list_all())
+
+    def to_snapshot(self) -> dict:
+        return {"journal_seq": self.journal_seq, "rows": list(self.rows())}
+
+    def to_json(self):
+        return json.dumps([r.to_dict() for r in self.list_all()], indent=2)
+
+    def process(self, max_per_shard: int | None = None) -> int:
+        """Run queued requests through the handler on every shard in parallel; returns how many."""
+        return sum(self._broadcast("process", max_per_shard))
+
+    def close(self):
+        for conn, proc in zip(self._conns, self._procs):
+            if proc.is_alive():
+                conn.send(("close", None))
+                conn.recv()
+            proc.join()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 class TreeNode:
+    __slots__ = ('student', 'left', 'right', 'height', 'size')
+
     def __init__(self, student: Student):
         self.student = student
         self.left = None    # smaller IDs
         self.right = None   # larger IDs
+        self.height = 1     # height of the subtree rooted here (AVL balance)
+        self.size = 1       # number of students in this subtree (order statistics)
+
+    def __setstate__(self, state):
+        # only pickles from before StudentBST pickled a flat list contain nodes
+        _restore_slots(self, state)
+
+def _height(node: TreeNode | None) -> int:
+    return node.height if node else 0
+
+def _size(node: TreeNode | None) -> int:
+    return node.size if node else 0
 
 class StudentBST:
+    """
+    AVL-balanced binary search tree of Students keyed by student_id.
+
+    Student IDs are issued sequentially, which would degrade a plain BST
+    into a linked list; rotating on insert/delete keeps the height at
+    O(log n) so insert, search and delete stay logarithmic. Each node also
+    tracks its subtree size, giving O(1) len() and O(log n) rank/select.
+
+    A hash index (student_id -> Student) is kept in sync alongside the tree,
+    so point lookups and membership are O(1); the tree serves ordered work.
+    A name index (normalized name -> IDs, plus trigrams) backs find_by_name,
+    and a course index (course code -> IDs) answers roster and enrollment
+    count queries without scanning students.
+
+    Listeners (such as a StudentJournal) registered with add_listener are
+    told about every insert, delete and field change via on_insert,
+    on_delete and on_change. journal_seq is the sequence number of the last
+    journal record reflected in the tree; it is pickled with the snapshot.
+    """
     def __init__(self):
         self.root = None
+        self.journal_seq = 0
+        self._listeners = []
+        self._clear_indexes()
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    # -- secondary indexes (kept in sync on every insert/delete/rebuild) --
+    def _clear_indexes(self):
+        self._by_id = {}        # student_id -> Student
+        self._by_name = {}      # normalized name -> set of student_ids
+        self._name_grams = {}   # name trigram -> set of student_ids
+        self._by_course = {}    # course code -> set of enrolled student_ids
+
+    def _index_add(self, student: Student):
+        self._by_id[student.student_id] = student
+        self._index_name(student.student_id, student.name)
+        self._index_courses(student.student_id, student.course_list)
+        student._owner = self
+
+    def _index_remove(self, student: Student):
+        del self._by_id[student.student_id]
+        self._unindex_name(student.student_id, student.name)
+        self._unindex_courses(student.student_id, student.course_list)
+        student._owner = None
+
+    def _reindex(self):
+        """Rebuild every secondary index from the tree."""
+        self._clear_indexes()
+        for student in self.in_order_traversal():
+            self._index_add(student)
+
+    def _student_changed(self, student: Student, field: str, old, new):
+        """Called by an owned Student whenever one of its fields changes."""
+        if field == 'name':
+            self._unindex_name(student.student_id, old)
+            self._index_name(student.student_id, new)
+        elif field == 'course_list':
+            self._unindex_courses(student.student_id, old)
+            self._index_courses(student.student_id, new)
+        elif field == 'course_add':
+            self._index_courses(student.student_id, (new,))
+        elif field == 'course_remove':
+            self._unindex_courses(student.student_id, (new,))
+        for listener in self._listeners:
+            listener.on_change(student, field, old, new)
+
+    def _index_courses(self, student_id: int, courses):
+        for course in courses:
+            self._by_course.setdefault(course, set()).add(student_id)
+
+    def _unindex_courses(self, student_id: int, courses):
+        for course in courses:
+            ids = self._by_course.get(course)
+            if ids is not None:
+                ids.discard(student_id)
+                if not ids:
+                    del self._by_course[course]
+
+    @staticmethod
+    def _trigrams(key: str) -> set:
+        return {key[i:i + 3] for i in range(len(key) - 2)}
+
+    def _index_name(self, student_id: int, name: str):
+        key = normalize_name(name)
+        self._by_name.setdefault(key, set()).add(student_id)
+        for gram in self._trigrams(key):
+            self._name_grams.setdefault(gram, set()).add(student_id)
+
+    def _unindex_name(self, student_id: int, name: str):
+        key = normalize_name(name)
+        ids = self._by_name.get(key)
+        if ids is not None:
+            ids.discard(student_id)
+            if not ids:
+                del self._by_name[key]
+        for gram in self._trigrams(key):
+            ids = self._name_grams.get(gram)
+            if ids is not None:
+                ids.discard(student_id)
+                if not ids:
+                    del self._name_grams[gram]
+
+    def __getstate__(self):
+        # pickle a flat, ordered list of students rather than the node graph,
+        # so saving never recurses through TreeNode.left/right
+        return {'students': list(self.in_order_traversal()),
+                'journal_seq': self.journal_seq}
 
-    def insert(self, student: Student):
-        """Insert a Student into the BST."""
-        if self.root is None:
-            self.root = TreeNode(student)
+    def __setstate__(self, state):
+        self.journal_seq = state.get('journal_seq', 0)
+        self._listeners = []
+        if 'students' in state:
+            students = state['students']
         else:
-            self._insert(self.root, student)
+            # older pickles hold the raw (possibly unbalanced) node graph
+            students = list(self._in_order(state.get('root')))
+        self.root = self._build(students, 0, len(students) - 1)
+        self._reindex()
 
-    def _insert(self, node: TreeNode, student: Student):
-        if student.student_id < node.student.student_id:
-            if node.left:
-                self._insert(node.left, student)
-            else:
-                node.left = TreeNode(student)
-        elif student.student_id > node.student.student_id:
-            if node.right:
-                self._insert(node.right, student)
+    @classmethod
+    def from_sorted(cls, students):
+        """
+        Build a perfectly balanced tree from an iterable of Students in O(n).
+        Input is sorted once by ID (already-sorted input costs O(n)).
+        """
+        tree = cls()
+        ordered = sorted(students, key=lambda s: s.student_id)
+        cls._check_unique(ordered)
+        tree.root = cls._build(ordered, 0, len(ordered) - 1)
+        tree._reindex()
+        return tree
+
+    def bulk_load(self, students):
+        """
+        Merge a batch of new Students into the tree. Large batches are merged
+        with the existing in-order sequence and rebuilt balanced in O(n + m);
+        small ones are simply inserted. Raises ValueError on a duplicate ID,
+        leaving the tree unchanged.
+        """
+        batch = sorted(students, key=lambda s: s.student_id)
+        self._check_unique(batch)
+        for student in batch:
+            if student.student_id in self:
+                raise ValueError(f"Student ID {student.student_id} already exists")
+        if len(batch) * _height(self.root) < len(self):
+            for student in batch:
+                self.insert(student)
+            return
+
+        merged = []
+        existing = self.in_order_traversal()
+        current = next(existing, None)
+        for student in batch:
+            while current is not None and current.student_id < student.student_id:
+                merged.append(current)
+                current = next(existing, None)
+            merged.append(student)
+        while current is not None:
+            merged.append(current)
+            current = next(existing, None)
+        self.root = self._build(merged, 0, len(merged) - 1)
+        for student in batch:
+            self._index_add(student)
+            for listener in self._listeners:
+                listener.on_insert(student)
+
+    @staticmethod
+    def _check_unique(ordered: list):
+        for prev, cur in zip(ordered, ordered[1:]):
+            if prev.student_id == cur.student_id:
+                raise ValueError(f"Student ID {cur.student_id} already exists")
+
+    @classmethod
+    def _build(cls, ordered: list, lo: int, hi: int) -> TreeNode | None:
+        """Build a balanced subtree from ordered[lo..hi] (recursion depth is O(log n))."""
+        if lo > hi:
+            return None
+        mid = (lo + hi) // 2
+        node = TreeNode(ordered[mid])
+        node.left = cls._build(ordered, lo, mid - 1)
+        node.right = cls._build(ordered, mid + 1, hi)
+        cls._update(node)
+        return node
+
+    # -- AVL helpers --
+    @staticmethod
+    def _update(node: TreeNode):
+        node.height = 1 + max(_height(node.left), _height(node.right))
+        node.size = 1 + _size(node.left) + _size(node.right)
+
+    def _rotate_right(self, node: TreeNode) -> TreeNode:
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_left(self, node: TreeNode) -> TreeNode:
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rebalance(self, node: TreeNode) -> TreeNode:
+        """Restore the AVL invariant at node and return the new subtree root."""
+        self._update(node)
+        balance = _height(node.left) - _height(node.right)
+        if balance > 1:
+            if _height(node.left.left) < _height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if _height(node.right.right) < _height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+    def _rebalance_path(self, path: list):
+        """
+        Rebalance every node on a root-to-leaf path, bottom up,
+        re-linking each rotated subtree into its parent.
+        """
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            subtree = self._rebalance(node)
+            if i == 0:
+                self.root = subtree
+            elif path[i - 1].left is node:
+                path[i - 1].left = subtree
             else:
-                node.right = TreeNode(student)
+                path[i - 1].right = subtree
+
+    def insert(self, student: Student):
+        """Insert a Student into the BST."""
+        student_id = student.student_id
+        if student_id in self._by_id:
+            raise ValueError(f"Student ID {student_id} already exists")
+        path = []
+        node = self.root
+        while node is not None:
+            path.append(node)
+            node = node.left if student_id < node.student.student_id else node.right
+
+        new_node = TreeNode(student)
+        self._index_add(student)
+        for listener in self._listeners:
+            listener.on_insert(student)
+        if not path:
+            self.root = new_node
+            return
+        parent = path[-1]
+        if student_id < parent.student.student_id:
+            parent.left = new_node
         else:
-            raise ValueError(f"Student ID {student.student_id} already exists")
+            parent.right = new_node
+        self._rebalance_path(path)
 
     def search(self, student_id: int) -> Student | None:
         """Return the Student with that ID, or None if not found."""
-        return self._search(self.root, student_id)
-
-    def _search(self, node: TreeNode, student_id: int):
-        if node is None:
-            return None
-        if student_id == node.student.student_id:
-            return node.student
-        elif student_id < node.student.student_id:
-            return self._search(node.left, student_id)
-        else:
-            return self._search(node.right, student_id)
+        return self._by_id.get(student_id)
 
     def delete(self, student_id: int):
         """Remove a student by ID."""
-        self.root = self._delete(self.root, student_id)
-
-    def _delete(self, node: TreeNode, student_id: int):
-        if node is None:
-            return None
-        if student_id < node.student.student_id:
-            node.left = self._delete(node.left, student_id)
-        elif student_id > node.student.student_id:
-            node.right = self._delete(node.right, student_id)
+        student = self._by_id.get(student_id)
+        if student is None:
+            return
+        self._index_remove(student)
+        for listener in self._listeners:
+            listener.on_delete(student)
+
+        path = []
+        node = self.root
+        while node is not None and node.student.student_id != student_id:
+            path.append(node)
+            node = node.left if student_id < node.student.student_id else node.right
+
+        target = node
+        if node.left is not None and node.right is not None:
+            # two children: replace with inorder successor, then unlink it
+            path.append(node)
+            target = node.right
+            while target.left is not None:
+                path.append(target)
+                target = target.left
+            node.student = target.student
+
+        child = target.left if target.left is not None else target.right
+        if not path:
+            self.root = child
+            return
+        parent = path[-1]
+        if parent.left is target:
+            parent.left = child
         else:
-            # -- node to delete found --
-            if node.left is None:
-                return node.right
-            if node.right is None:
-                return node.left
-            # two children: replace with inorder successor
-            succ_parent, succ = node, node.right
-            while succ.left:
-                succ_parent, succ = succ, succ.left
-            node.student = succ.student
-            # unlink successor
-            if succ_parent.left is succ:
-                succ_parent.left = succ.right
-            else:
-                succ_parent.right = succ.right
-        return node
+            parent.right = child
+        self._rebalance_path(path)
 
     def in_order_traversal(self):
         """Yield all Students in-order (ascending ID)."""
-        yield from self._in_order(self.root)
+        return self._in_order(self.root)
+
+    @staticmethod
+    def _in_order(node: TreeNode):
+        stack = []
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.student
+            node = node.right
+
+    def reverse_in_order_traversal(self):
+        """Yield all Students in reverse order (descending ID)."""
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.student
+            node = node.left
+
+    def __reversed__(self):
+        return self.reverse_in_order_traversal()
+
+    def range(self, lo: int | None = None, hi: int | None = None):
+        """
+        Lazily yield Students with lo <= student_id <= hi in ascending order.
+        Either bound may be None for an open-ended scan. Only subtrees that
+        can hold IDs in range are visited, so the cost is O(log n + k).
+        """
+        stack = []
+
+        def push_left(node):
+            while node is not None:
+                if lo is not None and node.student.student_id < lo:
+                    node = node.right   # whole left subtree is below lo
+                else:
+                    stack.append(node)
+                    node = node.left
+
+        push_left(self.root)
+        while stack:
+            node = stack.pop()
+            if hi is not None and node.student.student_id > hi:
+                return
+            yield node.student
+            push_left(node.right)
+
+    def floor(self, student_id: int) -> Student | None:
+        """Return the Student with the largest ID <= student_id, or None."""
+        best = None
+        node = self.root
+        while node is not None:
+            if node.student.student_id == student_id:
+                return node.student
+            if node.student.student_id < student_id:
+                best = node.student
+                node = node.right
+            else:
+                node = node.left
+        return best
+
+    def ceiling(self, student_id: int) -> Student | None:
+        """Return the Student with the smallest ID >= student_id, or None."""
+        best = None
+        node = self.root
+        while node is not None:
+            if node.student.student_id == student_id:
+                return node.student
+            if node.student.student_id > student_id:
+                best = node.student
+                node = node.left
+            else:
+                node = node.right
+        return best
 
-    def _in_order(self, node: TreeNode):
-        if not node:
+    def find_by_name(self, query: str, limit: int = 10) -> list[Student]:
+        """
+        Case-insensitive name search. Returns up to `limit` Students ranked:
+        exact name, then name prefix, then word prefix, then any substring
+        (ties broken by name, then ID).
+        """
+        key = normalize_name(query)
+        if not key or limit <= 0:
+            return []
+
+        if len(key) >= 3:
+            # candidates must contain every trigram of the query
+            postings = sorted((self._name_grams.get(g, set()) for g in self._trigrams(key)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+        else:
+            # too short for trigrams: scan the distinct names instead
+            candidates = {sid for name, ids in self._by_name.items() if key in name for sid in ids}
+
+        ranked = []
+        for sid in candidates:
+            student = self._by_id[sid]
+            name = normalize_name(student.name)
+            tier = _name_match_tier(key, name)
+            if tier is not None:
+                ranked.append((tier, name, sid, student))
+        return [entry[3] for entry in heapq.nsmallest(limit, ranked)]
+
+    def roster(self, course: str) -> list[Student]:
+        """Return the Students enrolled in a course, in ID order."""
+        return [self._by_id[sid] for sid in sorted(self._by_course.get(course, ()))]
+
+    def enrollment_count(self, course: str) -> int:
+        """Number of students enrolled in a course."""
+        return len(self._by_course.get(course, ()))
+
+    def course_counts(self) -> dict:
+        """Enrollment count for every course with at least one student."""
+        return {course: len(ids) for course, ids in self._by_course.items()}
+
+    def top_courses(self, k: int | None = None) -> list[tuple[str, int]]:
+        """Return the k most enrolled (course, count) pairs, most popular first."""
+        return _most_common(self.course_counts(), k)
+
+    def full_time_count(self) -> int:
+        return sum(1 for student in self.in_order_traversal() if student.is_full_time)
+
+    def rank(self, student_id: int) -> int:
+        """Return how many students have an ID smaller than student_id."""
+        rank = 0
+        node = self.root
+        while node is not None:
+            if student_id <= node.student.student_id:
+                node = node.left
+            else:
+                rank += _size(node.left) + 1
+                node = node.right
+        return rank
+
+    def select(self, k: int) -> Student:
+        """Return the k-th smallest Student (0-based)."""
+        if not 0 <= k < len(self):
+            raise IndexError(f"rank {k} out of range")
+        node = self.root
+        while True:
+            left_size = _size(node.left)
+            if k < left_size:
+                node = node.left
+            elif k == left_size:
+                return node.student
+            else:
+                k -= left_size + 1
+                node = node.right
+
+    def page(self, offset: int, limit: int):
+        """
+        Yield up to `limit` Students in ID order, starting at position `offset`.
+        Descends straight to the offset instead of walking the earlier pages.
+        """
+        if limit <= 0 or offset >= len(self):
             return
-        yield from self._in_order(node.left)
-        yield node.student
-        yield from self._in_order(node.right)
+        offset = max(offset, 0)
+        # build the in-order stack as if we had already yielded `offset` students
+        stack = []
+        node = self.root
+        while node is not None:
+            left_size = _size(node.left)
+            if offset < left_size:
+                stack.append(node)
+                node = node.left
+            elif offset == left_size:
+                stack.append(node)
+                break
+            else:
+                offset -= left_size + 1
+                node = node.right
+
+        while stack and limit > 0:
+            node = stack.pop()
+            yield node.student
+            limit -= 1
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
 
     def __contains__(self, student_id: int) -> bool:
-        return self.search(student_id) is not None
+        return student_id in self._by_id
 
     def __getitem__(self, student_id: int):
         student = self.search(student_id)
@@ -319,6 +1829,10 @@ class StudentBST:
     def keys(self):
         return [s.student_id for s in self.in_order_traversal()]
 
+    def student_ids(self):
+        """Unordered view of every student ID, straight from the hash index."""
+        return self._by_id.keys()
+
     def values(self):
         return list(self.in_order_traversal())
 
@@ -326,15 +1840,15 @@ class StudentBST:
         return [(s.student_id, s) for s in self.in_order_traversal()]
 
     def __len__(self):
-        return len(self.values())
+        return _size(self.root)
 
     def __bool__(self):
-        return bool(self.values())
+        return self.root is not None
 
     def print_tree(self, node=None, prefix="", is_left=True):
         """
-        Recursively prints an ASCII view of the tree,
-        showing each node’s student_id.
+        Prints an ASCII view of the tree, showing each node’s student_id.
+        Uses an explicit stack, so arbitrarily deep trees print safely.
         """
         if node is None:
             node = self.root
@@ -342,21 +1856,949 @@ class StudentBST:
                 print("<empty tree>")
                 return
 
-        # Print right subtree
-        if node.right:
-            self.print_tree(node.right,
-                            prefix + ("│   " if is_left else "    "),
-                            is_left=False)
-
-        # Print this node
-        connector = "└── " if is_left else "┌── "
-        print(prefix + connector + str(node.student.student_id))
-
-        # Print left subtree
-        if node.left:
-            self.print_tree(node.left,
-                            prefix + ("    " if is_left else "│   "),
-                            is_left=True)
+        # frames are (node, prefix, is_left, expanded); right subtree prints first
+        stack = [(node, prefix, is_left, False)]
+        while stack:
+            node, prefix, is_left, expanded = stack.pop()
+            if expanded:
+                connector = "└── " if is_left else "┌── "
+                print(prefix + connector + str(node.student.student_id))
+                continue
+            if node.left:
+                stack.append((node.left,
+                              prefix + ("    " if is_left else "│   "),
+                              True, False))
+            stack.append((node, prefix, is_left, True))
+            if node.right:
+                stack.append((node.right,
+                              prefix + ("│   " if is_left else "    "),
+                              False, False))
+
+def atomic_write(path: str, data: bytes):
+    """Write data to path via a temp file + fsync + rename, so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class Journal:
+    """
+    Append-only log of JSON records, one per line, each stamped with an
+    increasing sequence number. append() only buffers a record; commit()
+    writes the buffered records and fsyncs, so a commit costs time
+    proportional to the change rather than to the whole dataset.
+
+    With group_commit_ms > 0, concurrent commit() calls arriving within that
+    window are written together and share a single fsync: the first caller
+    waits out the window and flushes for everyone, the rest block until
+    their records are durable.
+
+    rotate() moves the live file aside (path + '.compacting') while a
+    snapshot covering it is written; records() reads both files in order.
+    Subclasses serialize their snapshot and hand it to _start_compaction,
+    which rotates and writes it on a background thread.
+    """
+    def __init__(self, path: str, group_commit_ms: float = 0, compact_every: int = 1000):
+        self.path = path
+        self.compact_every = compact_every
+        self._compactor = None
+        self.rotated_path = path + ".compacting"
+        self.group_commit_ms = group_commit_ms
+        self.seq = 0                  # last sequence number handed out
+        self.committed_records = 0    # records on disk since the last snapshot
+        self._pending = []
+        self._file = None
+        self._lock = threading.Condition()
+        self._staged_gen = 0          # generation currently collecting commits
+        self._durable_gen = -1        # last generation written and fsynced
+        self._flushing = False
+
+    def append(self, record: dict) -> int:
+        with self._lock:
+            self.seq += 1
+            self._pending.append(json.dumps({"seq": self.seq, **record}, separators=(',', ':')))
+            return self.seq
+
+    def commit(self):
+        """Write buffered records and fsync them to disk."""
+        with self._lock:
+            if not self._pending:
+                return
+            my_gen = self._staged_gen
+            while self._flushing:
+                self._lock.wait()
+                if self._durable_gen >= my_gen:
+                    return      # another thread's flush covered our records
+            self._flushing = True
+
+        if self.group_commit_ms:
+            time.sleep(self.group_commit_ms / 1000)   # let other commits join
+
+        with self._lock:
+            lines, self._pending = self._pending, []
+            flushed_gen = self._staged_gen
+            self._staged_gen += 1
+        try:
+            if lines:
+                if self._file is None:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        finally:
+            with self._lock:
+                self.committed_records += len(lines)
+                self._durable_gen = flushed_gen
+                self._flushing = False
+                self._lock.notify_all()
+
+    def records(self, after_seq: int = 0):
+        """
+        Yield committed records with seq > after_seq. A torn last line left
+        by a crash mid-write is dropped (and truncated away).
+        """
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb+') as f:
+                good_end = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        f.truncate(good_end)
+                        break
+                    good_end += len(line)
+                    self.committed_records += 1
+                    self.seq = max(self.seq, record["seq"])
+                    if record["seq"] > after_seq:
+                        yield record
+
+    def is_empty(self) -> bool:
+        """True when nothing (committed or buffered) is waiting to be replayed."""
+        return not self._pending and not any(
+            os.path.exists(p) and os.path.getsize(p) for p in (self.rotated_path, self.path))
+
+    def rotate(self) -> str:
+        """Commit, then move the live file aside and start a fresh one."""
+        self.commit()
+        self.close()
+        if os.path.exists(self.path):
+            if os.path.exists(self.rotated_path):
+                # leftover from an interrupted compaction: keep both in order
+                with open(self.rotated_path, 'ab') as dst, open(self.path, 'rb') as src:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.rotated_path)
+        self.committed_records = 0
+        return self.rotated_path
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # -- compaction --
+    def needs_compaction(self) -> bool:
+        return self.committed_records >= self.compact_every
+
+    def _compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def _start_compaction(self, snapshots: list):
+        """Rotate, then write [(path, data), ...] and drop the rotated file in the background."""
+        rotated = self.rotate()
+        self._compactor = threading.Thread(
+            target=self._write_snapshots, args=(snapshots, rotated), name="journal-compactor")
+        self._compactor.start()
+
+    @staticmethod
+    def _write_snapshots(snapshots: list, rotated: str):
+        for path, data in snapshots:
+            atomic_write(path, data)
+        # every record in the rotated file is now covered by the snapshot
+        if os.path.exists(rotated):
+            os.remove(rotated)
+        logging.info(f"Journal compacted into {', '.join(path for path, _ in snapshots)}.")
+
+    def wait(self):
+        """Block until any in-flight compaction has finished."""
+        if self._compactor is not None:
+            self._compactor.join()
+
+class StudentJournal(Journal):
+    """
+    Write-ahead journal of StudentBST mutations. Attach it to a tree and every
+    insert, delete, field change and course add/remove is appended as a
+    record. Loading replays the journal over the last snapshot; compact()
+    rolls it into a new snapshot on a background thread.
+
+    Inside `with journal.batch():` records are collected and written at the
+    end as one transaction (closed by a commit marker, so a torn write is
+    never half-applied) with a single fsync. If the block raises, every
+    in-memory change made inside it is rolled back and nothing is written.
+    """
+    def __init__(self, path: str, compact_every: int = 1000, group_commit_ms: float = 0):
+        super().__init__(path, group_commit_ms=group_commit_ms, compact_every=compact_every)
+        self.tree = None
+        self._batch_depth = 0
+        self._batch_records = []
+        self._undo = []             # inverse operations for the open batch
+        self._suspended = False     # True while rolling back
+
+    def attach(self, tree: StudentBST):
+        self.tree = tree
+        self.seq = max(self.seq, tree.journal_seq)
+        tree.add_listener(self)
+
+    def _log(self, record: dict, undo):
+        if self._suspended:
+            return
+        if self._batch_depth:
+            self._batch_records.append(record)
+            self._undo.append(undo)
+        else:
+            self.tree.journal_seq = self.append(record)
+
+    # -- StudentBST listener interface --
+    def on_insert(self, student: Student):
+        self._log({"op": "insert", "student": student.to_dict()},
+                  lambda: self.tree.delete(student.student_id))
+
+    def on_delete(self, student: Student):
+        self._log({"op": "delete", "id": student.student_id},
+                  lambda: self.tree.insert(student))
+
+    def on_change(self, student: Student, field: str, old, new):
+        if field in ('course_add', 'course_remove'):
+            def undo():
+                student.course_list = old
+                student.history_head = student.history_head.next
+            self._log({"op": "course", "id": student.student_id,
+                       "action": field.split('_', 1)[1], "course": new,
+                       "ts": student.history_head.timestamp.isoformat()}, undo)
+        elif field == 'email':
+            self._log({"op": "set", "id": student.student_id, "field": field, "value": new},
+                      lambda: student._set_encrypted_email(old))
+        else:
+            self._log({"op": "set", "id": student.student_id, "field": field, "value": new},
+                      lambda: setattr(student, field, old))
+
+    # -- transactions --
+    @contextmanager
+    def batch(self):
+        """
+        Group mutations into one atomic, durable write (rolled back on error).
+        Batches nest: the write happens when the outermost one ends, and a
+        block that raises rolls back only the changes made inside it.
+        """
+        mark = len(self._undo)
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            self._rollback(mark)
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth and self._batch_records:
+            records, self._batch_records, self._undo = self._batch_records, [], []
+            txn = self.seq + 1
+            for record in records:
+                self.append({**record, "txn": txn})
+            self.tree.journal_seq = self.append({"op": "commit", "txn": txn})
+            self.commit()
+
+    def _rollback(self, mark: int = 0):
+        # undo the changes logged since `mark` (a position in the open batch)
+        undo = self._undo[mark:]
+        del self._undo[mark:], self._batch_records[mark:]
+        self._suspended = True
+        try:
+            for inverse in reversed(undo):
+                inverse()
+        finally:
+            self._suspended = False
+        logging.info(f"Rolled back {len(undo)} uncommitted student change(s).")
+
+    def commit(self):
+        # inside a batch the write happens once, when the outermost batch ends
+        if not self._batch_depth:
+            super().commit()
+
+    # -- recovery --
+    def replay(self, tree: StudentBST) -> int:
+        """Apply journal records newer than the tree's snapshot; returns how many."""
+        applied = 0
+        open_txn = {}
+        for record in self.records(after_seq=tree.journal_seq):
+            if record["op"] == "commit":
+                for txn_record in open_txn.pop(record["txn"], []):
+                    self.apply(tree, txn_record)
+                    applied += 1
+            elif "txn" in record:
+                open_txn.setdefault(record["txn"], []).append(record)
+                continue
+            else:
+                self.apply(tree, record)
+                applied += 1
+            tree.journal_seq = record["seq"]
+        return applied
+
+    @staticmethod
+    def apply(tree: StudentBST, record: dict):
+        op = record["op"]
+        if op == "insert":
+            tree.insert(Student.from_dict(record["student"]))
+        elif op == "delete":
+            tree.delete(record["id"])
+        elif op == "course":
+            tree[record["id"]]._apply_course(record["course"], record["action"],
+                                             datetime.fromisoformat(record["ts"]))
+        elif op == "set":
+            student = tree[record["id"]]
+            if record["field"] == "email":
+                student._set_encrypted_email(record["value"])
+            else:
+                setattr(student, record["field"], record["value"])
+        else:
+            raise ValueError(f"Unknown journal op {op!r}")
+
+    # -- compaction --
+    def compact(self, snapshot_path: str, columnar_path: str | None = None) -> bool:
+        """
+        Roll the journal into a new snapshot of the attached tree (and, if
+        columnar_path is given, a matching ColumnarStudentStore file). The tree
+        is serialized here (so the snapshot is consistent); writing and fsyncing
+        happens on a background thread. Returns False (and does nothing)
+        inside a batch or while another compaction is running.
+        """
+        if self._batch_depth or self._compacting():
+            return False
+        self.commit()
+        snapshots = [(snapshot_path, pickle.dumps(self.tree, protocol=pickle.HIGHEST_PROTOCOL))]
+        if columnar_path:
+            try:
+                snapshots.append((columnar_path, ColumnarStudentStore.encode(
+                    self.tree.in_order_traversal(), self.tree.journal_seq)))
+            except (ValueError, TypeError, OverflowError, AttributeError) as e:
+                # the pickle alone is a full snapshot; the stale columnar file is
+                # older than it, so load_data will not take the fast path
+                logging.warning(f"Skipped columnar snapshot {columnar_path}: {e}")
+        self._start_compaction(snapshots)
+        return True
+
+class RequestJournal(Journal):
+    """
+    Append-only event log of a RequestQueue: one record per enqueue, dequeue,
+    removal and priority change, so persisting a change costs one line rather
+    than rewriting the whole queue. load replays it over the last snapshot
+    (a JSON or RequestSnapshot file written by compact()).
+    """
+    def __init__(self, path: str, compact_every: int = 1000, group_commit_ms: float = 0):
+        super().__init__(path, group_commit_ms=group_commit_ms, compact_every=compact_every)
+        self.queue = None
+
+    def attach(self, queue: RequestQueue):
+        self.queue = queue
+        self.seq = max(self.seq, queue.journal_seq)
+        queue.add_listener(self)
+
+    def _log(self, record: dict):
+        self.queue.journal_seq = self.append(record)
+
+    # -- RequestQueue listener interface --
+    def on_enqueue(self, req: StudentRequest):
+        self._log({"op": "enqueue", "request": req.to_dict()})
+
+    def on_dequeue(self, req: StudentRequest):
+        self._log({"op": "dequeue", "id": req.request_id})
+
+    def on_remove(self, req: StudentRequest):
+        self._log({"op": "remove", "id": req.request_id})
+
+    def on_priority(self, req: StudentRequest):
+        self._log({"op": "priority", "id": req.request_id, "priority": req.priority_level})
+
+    # -- recovery --
+    def replay(self, queue: RequestQueue) -> int:
+        """Apply journal records newer than the queue's snapshot; returns how many."""
+        applied = 0
+        for record in self.records(after_seq=queue.journal_seq):
+            self.apply(queue, record)
+            queue.journal_seq = record["seq"]
+            applied += 1
+        return applied
+
+    @staticmethod
+    def apply(queue: RequestQueue, record: dict):
+        op = record["op"]
+        if op == "enqueue":
+            queue.enqueue(StudentRequest.from_dict(record["request"]))
+        elif op in ("dequeue", "remove"):
+            # remove by ID, so replay does not depend on ties resolving the same way
+            queue.remove_request(record["id"])
+        elif op == "priority":
+            queue.update_priority(record["id"], record["priority"])
+        else:
+            raise ValueError(f"Unknown journal op {op!r}")
+
+    # -- compaction --
+    def compact(self, snapshot_path: str, binary: bool = False) -> bool:
+        """
+        Write the attached queue as a snapshot stamped with journal_seq (JSON,
+        or a RequestSnapshot if binary) and start a new journal; the file is
+        written on a background thread. Returns False while another
+        compaction is running.
+        """
+        if self._compacting():
+            return False
+        self.commit()
+        self._start_compaction([(snapshot_path, RequestSnapshot.dumps(self.queue, binary))])
+        return True
+
+class _RowColumns:
+    """Rows held as parallel lists; rows[i] is the i-th row in StudentRequest.to_row() form."""
+    __slots__ = ('request_ids', 'student_ids', 'types', 'priorities', 'details', 'timestamps')
+
+    def __init__(self, request_ids, student_ids, types, priorities, details, timestamps):
+        self.request_ids, self.student_ids, self.types = request_ids, student_ids, types
+        self.priorities, self.details, self.timestamps = priorities, details, timestamps
+
+    def __len__(self):
+        return len(self.request_ids)
+
+    def __getitem__(self, i):
+        return (self.request_ids[i], self.student_ids[i], self.types[i],
+                self.priorities[i], self.details[i], self.timestamps[i])
+
+class RequestSnapshot:
+    """
+    Binary snapshot of a RequestQueue, smaller and faster to write and load
+    than JSON (which stays the export format, see RequestQueue.to_json).
+
+    File layout (little-endian): a header (magic, version, request count,
+    string count, journal_seq), then
+
+        str_off     uint32[k+1] offsets into `strings`
+        strings     bytes       UTF-8 request types and details, each stored once
+        records     n x (request_id int64, student_id int64, priority int32,
+                         type uint32, details uint32, timestamp_us int64)
+
+    where type and details index the string table. Records are in dequeue
+    order, so loading keeps the FIFO order of equal-priority requests.
+    """
+    MAGIC = b"REQSNP\x00\x01"
+    VERSION = 1
+    _HEADER = struct.Struct("<8sIIIQ")
+    _RECORD = struct.Struct("<qqiIIq")
+    _DTYPE = np.dtype([("request_id", "<i8"), ("student_id", "<i8"), ("priority", "<i4"),
+                       ("type", "<u4"), ("details", "<u4"), ("timestamp_us", "<i8")])   # = _RECORD
+
+    @classmethod
+    def encode(cls, queue: RequestQueue) -> bytes:
+        """The queue's snapshot bytes; ValueError if a request does not fit the record fields."""
+        strings = {}
+        records = bytearray()
+        for request_id, student_id, request_type, priority, details, timestamp_us in queue.rows():
+            try:
+                records += cls._RECORD.pack(
+                    request_id, student_id, priority,
+                    strings.setdefault(request_type, len(strings)),
+                    strings.setdefault(details, len(strings)),
+                    timestamp_us)
+            except struct.error as e:
+                raise ValueError(f"request {request_id} does not fit a snapshot record: {e}") from e
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = list(itertools.accumulate(map(len, encoded), initial=0))
+        header = cls._HEADER.pack(cls.MAGIC, cls.VERSION, len(records) // cls._RECORD.size,
+                                  len(encoded), queue.journal_seq)
+        return header + struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(encoded) + bytes(records)
+
+    @classmethod
+    def decode(cls, data: bytes, policy=None) -> RequestQueue:
+        global _last_request_id
+        magic, version, count, n_strings, journal_seq = cls._HEADER.unpack_from(data, 0)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("not a request queue snapshot")
+        position = cls._HEADER.size
+        offsets = struct.unpack_from(f"<{n_strings + 1}I", data, position)
+        position += 4 * (n_strings + 1)
+        strings = [sys.intern(bytes(data[position + a:position + b]).decode('utf-8'))
+                   for a, b in zip(offsets, offsets[1:])]
+        position += offsets[-1]
+
+        # decode the record columns with NumPy; the queue refers to rows of them by index
+        records = np.frombuffer(data, dtype=cls._DTYPE, count=count, offset=position)
+        priorities, timestamps = records["priority"], records["timestamp_us"]
+        table = np.array(strings, dtype=object)
+        rows = _RowColumns(records["request_id"].tolist(), records["student_id"].tolist(),
+                           table[records["type"]].tolist(), priorities.tolist(),
+                           table[records["details"]].tolist(), timestamps.tolist())
+
+        q = None
+        if _in_priority_order(priorities, timestamps):
+            levels, level_counts = np.unique(priorities, return_counts=True)
+            types, type_counts = np.unique(records["type"], return_counts=True)
+            q = RequestQueue._from_sorted_columns(
+                rows.request_ids, rows.priorities, rows.timestamps, rows,
+                dict(zip(levels.tolist(), level_counts.tolist())),
+                {strings[t]: n for t, n in zip(types.tolist(), type_counts.tolist())}, policy)
+        if q is None:
+            # records out of order or with repeated IDs: take the general path
+            q = RequestQueue.from_requests(map(StudentRequest.from_row, rows), policy)
+        q.journal_seq = journal_seq
+        if count:
+            _last_request_id = max(_last_request_id, int(records["request_id"].max()))
+        return q
+
+    @classmethod
+    def dumps(cls, queue: RequestQueue, binary: bool = True) -> bytes:
+        """The queue as a snapshot file's bytes: binary, or the JSON to_snapshot() form."""
+        if binary:
+            return cls.encode(queue)
+        return json.dumps(queue.to_snapshot(), separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def write(cls, path: str, queue: RequestQueue, binary: bool = True):
+        atomic_write(path, cls.dumps(queue, binary))
+
+    @classmethod
+    def load(cls, path: str, policy=None) -> RequestQueue:
+        """Load a snapshot file in either format (or a to_json() export)."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data.startswith(cls.MAGIC):
+            return cls.decode(data, policy)
+        q = RequestQueue.from_json(data)
+        q.policy = policy
+        return q
+
+    @classmethod
+    def load_latest(cls, paths, policy=None):
+        """
+        Load the most recently written of the snapshot files that exist;
+        returns (path, queue), or (None, None) if there are none. After a
+        switch of format the file in the old format is stale, since
+        compaction has already dropped the journal records it lacks.
+        """
+        existing = [path for path in paths if os.path.exists(path)]
+        if not existing:
+            return None, None
+        path = max(existing, key=os.path.getmtime)
+        return path, cls.load(path, policy)
+
+class ProcessedLog:
+    """
+    Long-lived, buffered writer for the processed-requests log (one JSON line
+    per processed request).
+
+    Lines are buffered and written every `flush_every` records, or at most
+    `flush_ms` after the first unwritten one (a timer thread handles idle
+    periods); with fsync=True each flush is also fsynced. close() flushes.
+
+    A bounded index of the last `dedup_size` requests logged (an LRU, warmed
+    from the existing files on open) suppresses a request that is processed
+    again after undo/redo, so each request is logged once. Requests are told
+    apart by (request_id, student_id, timestamp): IDs start again from the
+    pending queue after a restart, so an ID alone can repeat in the log.
+
+    When the live file grows past `max_bytes` it is sealed as path.1, path.2,
+    ... and a fresh one started; path.index.json records which requests each
+    sealed segment holds, so segments_for() can find a request without
+    reading the logs.
+    """
+    def __init__(self, path: str, flush_every: int = 32, flush_ms: float = 1000,
+                 fsync: bool = False, max_bytes: int = 1 << 20, dedup_size: int = 10000):
+        self.path = path
+        self.index_path = path + ".index.json"
+        self.flush_every = flush_every
+        self.flush_ms = flush_ms
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.dedup_size = dedup_size
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._timer = None
+        self._file = None
+        self._size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._live_keys = []      # request keys in the live (unsealed) file
+        self._seen = OrderedDict()  # request key -> None, most recent last
+
+        self.segments = {}        # sealed segment path -> [[request_id, student_id, timestamp], ...]
+        self._segment_of = {}     # request_id -> [sealed segment path, ...]
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                self.segments = json.load(f)["segments"]
+        for segment, keys in self.segments.items():
+            for key in keys:
+                if not isinstance(key, list):
+                    # older index: bare request IDs, too little to dedup on
+                    self._segment_of.setdefault(key, []).append(segment)
+                    continue
+                self._segment_of.setdefault(key[0], []).append(segment)
+                self._remember(tuple(key))
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        key = self.key(json.loads(line))
+                    except ValueError:
+                        continue    # torn last line from a crash
+                    if key is not None:
+                        self._live_keys.append(key)
+                        self._remember(key)
+
+    @staticmethod
+    def key(entry: dict) -> tuple | None:
+        """(request_id, student_id, timestamp) of a log entry, or None if it has no ID."""
+        if entry.get("request_id") is None:
+            return None
+        return entry["request_id"], entry.get("student_id"), entry.get("timestamp")
+
+    def _remember(self, key):
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+
+    def seen(self, entry: dict) -> bool:
+        """Whether this request (see key()) was logged recently."""
+        return self.key(entry) in self._seen
+
+    def record(self, entry: dict) -> bool:
+        """
+        Buffer one processed-request entry. Returns False (and writes
+        nothing) if the same request was logged recently.
+        """
+        key = self.key(entry)
+        with self._lock:
+            if key is not None:
+                if key in self._seen:
+                    return False
+                self._remember(key)
+            self._buffer.append((key, json.dumps(entry) + "\n"))
+            if len(self._buffer) >= self.flush_every:
+                self.flush()
+            elif self.flush_ms and self._timer is None:
+                self._timer = threading.Timer(self.flush_ms / 1000, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return True
+
+    def flush(self):
+        """Write buffered entries (and fsync if configured), rotating by size."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            lines, self._buffer = self._buffer, []
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            for key, line in lines:
+                self._file.write(line)
+                self._size += len(line.encode('utf-8'))
+                if key is not None:
+                    self._live_keys.append(key)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            if self._size >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        segment = f"{self.path}.{len(self.segments) + 1}"
+        os.replace(self.path, segment)
+        self.segments[segment] = [list(key) for key in self._live_keys]
+        for key in self._live_keys:
+            self._segment_of.setdefault(key[0], []).append(segment)
+        atomic_write(self.index_path, json.dumps({"segments": self.segments}).encode('utf-8'))
+        self._live_keys = []
+        self._size = 0
+        logging.info(f"Sealed processed-request log segment {segment}.")
+
+    def segments_for(self, request_id) -> list[str]:
+        """Files (sealed segments, then the live file) holding entries for a request ID."""
+        with self._lock:
+            found = list(dict.fromkeys(self._segment_of.get(request_id, ())))
+            if any(key[0] == request_id for key in self._live_keys) or \
+                    any(key and key[0] == request_id for key, _ in self._buffer):
+                found.append(self.path)
+            return found
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class StudentRow:
+    """
+    Read-only student record decoded from a ColumnarStudentStore. It offers
+    the same read API as Student (email, display_details, ...) without the
+    history list or any index bookkeeping.
+    """
+    __slots__ = ('student_id', 'name', '_encrypted_email', '_email_cache',
+                 'course_list', 'year_of_study', 'is_full_time', 'history_head')
+
+    def __init__(self, student_id, name, encrypted_email, course_list, year_of_study, is_full_time):
+        self.student_id = student_id
+        self.name = name
+        self._encrypted_email = encrypted_email
+        self._email_cache = None
+        self.course_list = course_list
+        self.year_of_study = year_of_study
+        self.is_full_time = is_full_time
+        self.history_head = None     # history is only kept in the full snapshot
+
+    email = property(Student.email.fget)
+    display_details = Student.display_details
+
+class ColumnarStudentStore:
+    """
+    Memory-mapped, column-oriented snapshot of the student roster.
+
+    File layout (little-endian): a header (magic, version, student count,
+    course count, journal_seq) and a table of (offset, length) pairs for the
+    sections below, each 8-byte aligned:
+
+        ids         int64[n]    sorted ascending
+        years       int32[n]
+        full_time   uint8[n]
+        name_off    uint64[n+1] offsets into `names` (UTF-8 heap)
+        names       bytes
+        email_off   uint64[n+1] offsets into `emails` (encrypted, base64)
+        emails      bytes
+        course_off  uint64[n+1] offsets into `course_ids`
+        course_ids  int32[m]    dictionary-encoded enrollments
+        dict_off    uint64[k+1] offsets into `dict_names`
+        dict_names  bytes       course codes, sorted
+
+    Opening the file only maps it, so startup cost does not grow with the
+    roster. Counts and lookups run on NumPy views of the mapped columns;
+    StudentRow objects are decoded only for the rows a caller asks for. It
+    mirrors the read-only parts of the StudentBST API (len, search, page,
+    range, find_by_name, roster, course counts) so views can use either.
+    """
+    MAGIC = b"STUCOL\x00\x01"
+    VERSION = 1
+    _HEADER = struct.Struct("<8sIIIIQ")
+    _SECTIONS = ("ids", "years", "full_time", "name_off", "names", "email_off",
+                 "emails", "course_off", "course_ids", "dict_off", "dict_names")
+    _TABLE = struct.Struct("<" + "QQ" * len(_SECTIONS))
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count, n_courses, _, self.journal_seq = \
+            self._HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{path} is not a columnar student store")
+        table = self._TABLE.unpack_from(self._mm, self._HEADER.size)
+        self._sections = {name: (table[2 * i], table[2 * i + 1])
+                          for i, name in enumerate(self._SECTIONS)}
+
+        self.ids = self._column("ids", np.int64)
+        self.years = self._column("years", np.int32)
+        self.full_time = self._column("full_time", np.uint8)
+        self._name_off = self._column("name_off", np.uint64)
+        self._email_off = self._column("email_off", np.uint64)
+        self._course_off = self._column("course_off", np.uint64)
+        self._course_ids = self._column("course_ids", np.int32)
+        dict_off = self._column("dict_off", np.uint64).tolist()
+        base = self._sections["dict_names"][0]
+        self._courses = [bytes(self._mm[base + a:base + b]).decode('utf-8')
+                         for a, b in zip(dict_off, dict_off[1:])]
+        self._course_index = {code: i for i, code in enumerate(self._courses)}
+
+    def _column(self, section: str, dtype) -> np.ndarray:
+        offset, length = self._sections[section]
+        return np.frombuffer(self._mm, dtype=dtype, count=length // np.dtype(dtype).itemsize,
+                             offset=offset)
+
+    def _text(self, section: str, offsets: np.ndarray, i: int) -> str:
+        base = self._sections[section][0]
+        return bytes(self._mm[base + int(offsets[i]):base + int(offsets[i + 1])]).decode('utf-8')
+
+    # -- writing --
+    @classmethod
+    def write(cls, path: str, students, journal_seq: int = 0):
+        """Write students (in ascending ID order) as a columnar snapshot, atomically."""
+        atomic_write(path, cls.encode(students, journal_seq))
+
+    @classmethod
+    def encode(cls, students, journal_seq: int = 0) -> bytes:
+        ids, years, full_time = [], [], []
+        names, emails, enrollments = [], [], []
+        course_off = [0]
+        for student in students:
+            ids.append(student.student_id)
+            years.append(student.year_of_study)
+            full_time.append(1 if student.is_full_time else 0)
+            names.append(str(student.name or "").encode('utf-8'))
+            emails.append(student._encrypted_email.encode('utf-8'))
+            enrollments.extend(student.course_list)
+            course_off.append(len(enrollments))
+        courses = sorted(set(enrollments))
+        course_index = {code: i for i, code in enumerate(courses)}
+        course_names = [code.encode('utf-8') for code in courses]
+
+        def offsets(chunks):
+            return np.concatenate(([0], np.cumsum([len(c) for c in chunks], dtype=np.uint64))).astype(np.uint64)
+
+        sections = {
+            "ids":        np.asarray(ids, dtype=np.int64).tobytes(),
+            "years":      np.asarray(years, dtype=np.int32).tobytes(),
+            "full_time":  np.asarray(full_time, dtype=np.uint8).tobytes(),
+            "name_off":   offsets(names).tobytes(),
+            "names":      b"".join(names),
+            "email_off":  offsets(emails).tobytes(),
+            "emails":     b"".join(emails),
+            "course_off": np.asarray(course_off, dtype=np.uint64).tobytes(),
+            "course_ids": np.asarray([course_index[c] for c in enrollments], dtype=np.int32).tobytes(),
+            "dict_off":   offsets(course_names).tobytes(),
+            "dict_names": b"".join(course_names),
+        }
+        table, body = [], bytearray()
+        position = cls._HEADER.size + cls._TABLE.size
+        for name in cls._SECTIONS:
+            data = sections[name]
+            padding = -(position + len(body)) % 8
+            body += b"\x00" * padding
+            table += [position + len(body), len(data)]
+            body += data
+        header = cls._HEADER.pack(cls.MAGIC, cls.VERSION, len(ids), len(courses), 0, journal_seq)
+        return header + cls._TABLE.pack(*table) + bytes(body)
+
+    @classmethod
+    def from_pickle(cls, pickle_path: str, path: str):
+        """Convert an existing student_data.pkl (StudentBST or old dict) into this format."""
+        with open(pickle_path, 'rb') as f:
+            data = pickle.load(f)
+        if isinstance(data, dict):
+            data = StudentBST.from_sorted(data.values())
+        cls.write(path, data.in_order_traversal(), data.journal_seq)
+
+    def close(self):
+        self.ids = self.years = self.full_time = None
+        self._name_off = self._email_off = self._course_off = self._course_ids = None
+        self._mm.close()
+
+    # -- row access --
+    def _row(self, i: int) -> StudentRow:
+        a, b = int(self._course_off[i]), int(self._course_off[i + 1])
+        courses = [self._courses[c] for c in self._course_ids[a:b].tolist()]
+        return StudentRow(int(self.ids[i]), self._text("names", self._name_off, i),
+                          self._text("emails", self._email_off, i), courses,
+                          int(self.years[i]), bool(self.full_time[i]))
+
+    def _position(self, student_id: int) -> int | None:
+        i = int(np.searchsorted(self.ids, student_id))
+        return i if i < self._count and self.ids[i] == student_id else None
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __contains__(self, student_id: int) -> bool:
+        return self._position(student_id) is not None
+
+    def search(self, student_id: int) -> StudentRow | None:
+        i = self._position(student_id)
+        return None if i is None else self._row(i)
+
+    def __getitem__(self, student_id: int):
+        row = self.search(student_id)
+        if row is None:
+            raise KeyError(f"{student_id!r} not found")
+        return row
+
+    def in_order_traversal(self):
+        return (self._row(i) for i in range(self._count))
+
+    def values(self):
+        return list(self.in_order_traversal())
+
+    def to_students(self) -> list:
+        """Editable Student objects for every row, in ID order (course history is not kept here)."""
+        students = []
+        for row in self.in_order_traversal():
+            student = Student.__new__(Student)
+            student.__setstate__({"name": row.name, "student_id": row.student_id,
+                                  "_encrypted_email": row._encrypted_email,
+                                  "course_list": row.course_list,
+                                  "year_of_study": row.year_of_study,
+                                  "is_full_time": row.is_full_time})
+            students.append(student)
+        return students
+
+    def keys(self):
+        return self.ids.tolist()
+
+    def student_ids(self):
+        return self.ids.tolist()
+
+    def page(self, offset: int, limit: int):
+        start = max(offset, 0)
+        return (self._row(i) for i in range(start, min(start + max(limit, 0), self._count)))
+
+    def range(self, lo: int | None = None, hi: int | None = None):
+        start = 0 if lo is None else int(np.searchsorted(self.ids, lo, side='left'))
+        stop = self._count if hi is None else int(np.searchsorted(self.ids, hi, side='right'))
+        return (self._row(i) for i in range(start, stop))
+
+    # -- queries --
+    def find_by_name(self, query: str, limit: int = 10) -> list[StudentRow]:
+        """Same ranking as StudentBST.find_by_name, scanning the name heap."""
+        key = normalize_name(query)
+        if not key or limit <= 0:
+            return []
+        base, length = self._sections["names"]
+        heap = bytes(self._mm[base:base + length])
+        offsets = self._name_off.tolist()
+        ranked = []
+        for i in range(self._count):
+            normalized = normalize_name(heap[offsets[i]:offsets[i + 1]].decode('utf-8'))
+            tier = _name_match_tier(key, normalized)
+            if tier is not None:
+                ranked.append((tier, normalized, int(self.ids[i]), i))
+        return [self._row(entry[3]) for entry in heapq.nsmallest(limit, ranked)]
+
+    def _course_counts_array(self) -> np.ndarray:
+        return np.bincount(self._course_ids, minlength=len(self._courses))
+
+    def course_counts(self) -> dict:
+        counts = self._course_counts_array().tolist()
+        return {code: n for code, n in zip(self._courses, counts) if n}
+
+    def top_courses(self, k: int | None = None) -> list[tuple[str, int]]:
+        return _most_common(self.course_counts(), k)
+
+    def enrollment_count(self, course: str) -> int:
+        c = self._course_index.get(course)
+        return 0 if c is None else int(np.count_nonzero(self._course_ids == c))
+
+    def roster(self, course: str) -> list[StudentRow]:
+        c = self._course_index.get(course)
+        if c is None:
+            return []
+        positions = np.flatnonzero(self._course_ids == c)
+        rows = np.searchsorted(self._course_off, positions, side='right') - 1
+        return [self._row(int(i)) for i in rows]
+
+    def full_time_count(self) -> int:
+        return int(np.count_nonzero(self.full_time))
 
 class FaceAuth:
     """
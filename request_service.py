@@ -0,0 +1,208 @@
+"""
+Local request-intake service in front of one in-memory RequestQueue.
+
+Protocol: newline-delimited JSON over TCP. Each line is a call, answered by
+one line ({"ok": true, ...} or {"ok": false, "error": "..."}):
+
+    {"op": "enqueue", "student_id": 1001, "request_type": "Fee Waiver",
+     "priority_level": 2, "request_details": "..."}
+    {"op": "dequeue"}
+    {"op": "peek"}
+    {"op": "stats"}
+    {"op": "cancel", "request_id": 42}
+
+Changes go through the same RequestJournal / snapshot files as the CLI, so
+run one or the other against a data directory, not both at once.
+Replies to enqueue, dequeue and cancel are sent once the change is on disk;
+all calls arriving within one flush window share a single journal commit.
+
+    python request_service.py serve   [--host H] [--port P] [--flush-ms MS] [--compact-every N]
+                                      [--snapshot-format json|binary]
+    python request_service.py loadgen [--clients C] [--requests N]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+from models import (RequestQueue, RequestJournal, RequestSnapshot, StudentRequest, make_dummy_requests,
+                    fits_int, INT32_MAX, INT64_MAX)
+
+REQUEST_FILE = "requests_data.json"
+REQUEST_BINARY_FILE = "requests_data.bin"
+REQUEST_JOURNAL_FILE = "requests_journal.jsonl"
+
+
+class RequestService:
+    def __init__(self, binary=False, journal_path=REQUEST_JOURNAL_FILE, flush_ms=2, compact_every=20_000):
+        self.binary = binary
+        self.snapshot_path = REQUEST_BINARY_FILE if binary else REQUEST_FILE
+        self.flush_ms = flush_ms
+        # newest snapshot of either format, as in the CLI's load_requests
+        _, loaded = RequestSnapshot.load_latest((REQUEST_FILE, REQUEST_BINARY_FILE))
+        self.queue = loaded if loaded is not None else RequestQueue()
+        self.journal = RequestJournal(journal_path, compact_every=compact_every)
+        self.journal.replay(self.queue)
+        self.journal.attach(self.queue)
+        self._waiters = []          # futures resolved by the next journal commit
+        self._flusher = None
+
+    # -- coalesced persistence --
+    async def _durable(self):
+        """Wait until every change made so far has been committed."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+        await future
+
+    async def _flush(self):
+        # one flusher at a time, so a commit never overlaps compact() rotating the journal
+        try:
+            while self._waiters:
+                await asyncio.sleep(self.flush_ms / 1000)   # let concurrent calls join this commit
+                waiters, self._waiters = self._waiters, []
+                try:
+                    # fsync off the event loop; Journal.commit is thread-safe
+                    await asyncio.get_running_loop().run_in_executor(None, self.journal.commit)
+                except Exception as e:
+                    for future in waiters:
+                        future.set_exception(e)
+                    continue
+                for future in waiters:
+                    future.set_result(None)
+                # the waiters' changes are durable already; a failed compaction is retried later
+                if self.journal.needs_compaction():
+                    try:
+                        self.journal.compact(self.snapshot_path, binary=self.binary)
+                    except Exception:
+                        logging.exception("Request journal compaction failed.")
+        finally:
+            self._flusher = None
+
+    # -- calls --
+    @staticmethod
+    def _int(message: dict, field: str, max_value=INT64_MAX) -> int:
+        # int() alone accepts 1e400 (OverflowError) and values the snapshot can't store
+        try:
+            value = int(message[field])
+        except OverflowError:
+            raise ValueError(f"{field} is out of range")
+        if not fits_int(value, max_value):
+            raise ValueError(f"{field} is out of range")
+        return value
+
+    async def call(self, message: dict) -> dict:
+        if not isinstance(message, dict):
+            raise ValueError("a call must be a JSON object")
+        op = message.get("op")
+        if op == "enqueue":
+            req = StudentRequest(self._int(message, "student_id"), str(message["request_type"]),
+                                 self._int(message, "priority_level", INT32_MAX),
+                                 str(message.get("request_details", "")))
+            self.queue.enqueue(req)
+            await self._durable()
+            return {"request": req.to_dict()}
+        if op == "dequeue":
+            req = self.queue.dequeue()
+            if req is not None:
+                await self._durable()
+            return {"request": req.to_dict() if req else None}
+        if op == "peek":
+            req = self.queue.peek()
+            return {"request": req.to_dict() if req else None}
+        if op == "cancel":
+            req = self.queue.remove_request(self._int(message, "request_id"))
+            if req is not None:
+                await self._durable()
+            return {"cancelled": req is not None}
+        if op == "stats":
+            return {"pending": self.queue.size(),
+                    "by_type": self.queue.type_counts(),
+                    "by_priority": {str(p): n for p, n in self.queue.priority_counts().items()},
+                    "oldest": {str(p): ts.isoformat() for p, ts in self.queue.oldest_pending().items()}}
+        raise ValueError(f"unknown op {op!r}")
+
+    async def handle_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = {"ok": True, **await self.call(json.loads(line))}
+                except Exception as e:
+                    # bad input or a failed journal commit: report it, keep the connection
+                    reply = {"ok": False, "error": str(e) or type(e).__name__}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        logging.info(f"Request service listening on {host}:{port}")
+        print(f"Request service listening on {host}:{port} ({self.queue.size()} pending)")
+        async with server:
+            await server.serve_forever()
+
+
+# -- load generator --
+async def _client(host, port, payloads, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    for payload in payloads:
+        start = time.perf_counter()
+        writer.write(payload)
+        await writer.drain()
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+def _percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def loadgen(host, port, clients, total):
+    payloads = [json.dumps({"op": "enqueue", "student_id": r.student_id, "request_type": r.request_type,
+                            "priority_level": r.priority_level,
+                            "request_details": r.request_details}).encode() + b"\n"
+                for r in make_dummy_requests(total)]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, payloads[i::clients], latencies) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{len(latencies)} enqueues from {clients} clients in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"p50 {_percentile(latencies, 50) * 1000:.2f} ms   p99 {_percentile(latencies, 99) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=("serve", "loadgen"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--flush-ms", type=float, default=2)
+    parser.add_argument("--compact-every", type=int, default=20_000)
+    parser.add_argument("--snapshot-format", choices=("json", "binary"),
+                        default=os.getenv("REQUEST_SNAPSHOT_FORMAT", "json").lower())
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        logging.basicConfig(filename='student_system.log', level=logging.INFO,
+                            format='%(asctime)s - %(levelname)s - %(message)s',
+                            datefmt='%Y-%m-%d %H:%M:%S')
+        service = RequestService(binary=args.snapshot_format == "binary", flush_ms=args.flush_ms,
+                                 compact_every=args.compact_every)
+        asyncio.run(service.serve(args.host, args.port))
+    else:
+        asyncio.run(loadgen(args.host, args.port, args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()